@@ -0,0 +1,110 @@
+"""Failure scenarios: run CLI commands against a mock Taiga server that answers some requests with errors.
+
+Each scenario runs a command twice, each time against a freshly generated
+instance served by `mock_taiga.py` in this process and from an empty config
+directory: once as is, and once with failures injected into the server's
+answers. The second run must send exactly the expected extra requests (the
+retries, plus any reads a retry needs), print the same as the first one and,
+when the server asked for it with Retry-After, take at least that long.
+
+Usage: python benchmarks/failures.py [--only NAME ...]
+"""
+import argparse
+import compileall
+import io
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from mock_taiga import Failure, MockTaiga, build_instance
+from run import prepare_home
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# A command, the failures injected while it runs, the requests they add and the seconds the run takes at least
+Scenario = namedtuple("Scenario", ["argv", "failures", "extra_requests", "min_seconds"], defaults=(0,))
+
+VERSION_CONFLICT = {"version": "The version doesn't match with the current one"}
+
+SCENARIOS = {
+    # Retried by the transport after its backoff
+    "bad-gateway": Scenario(["sprint", "user-stats", "--all-users"], [Failure(502)], 1),
+    # Retried by the transport once the server's Retry-After has passed
+    "rate-limited": Scenario(["sprint", "user-stats", "--all-users"], [Failure(429, {"Retry-After": "0.5"})], 1, 0.5),
+    # The story is read again and the PATCH sent with its current version
+    "version-conflict": Scenario(["stories", "close", "--all-users"], [Failure(400, method="PATCH", body=VERSION_CONFLICT)], 2),
+}
+
+# Seconds the first retry waits at most, so backoffs do not slow the scenarios down
+BACKOFF = 0.05
+
+
+def run_command(argv, failures):
+    """Run a CLI command in this process against a fresh instance with fresh CLI modules.
+
+    Returns the requests the server received, the lines printed and the elapsed seconds.
+    """
+    mock = MockTaiga(build_instance(projects=1, sprints=2, stories=40))
+    api_url = mock.start()
+    try:
+        os.environ["HOME"] = prepare_home(api_url)
+        config_file = Path(os.environ["HOME"]) / ".config" / "taiga-cli" / "config.json"
+        config_file.write_text(json.dumps({**json.loads(config_file.read_text()), "http": {"backoff": BACKOFF}}))
+        # Module-level state (the API client, caches, the parser) must not leak between runs
+        for name in [name for name in sys.modules if name.startswith("taiga_cli")]:
+            del sys.modules[name]
+        from taiga_cli.main import dispatch
+
+        mock.failures = list(failures)
+        printed = io.StringIO()
+        with redirect_stdout(printed), redirect_stderr(printed):
+            started = time.perf_counter()
+            dispatch(argv)
+            seconds = time.perf_counter() - started
+        if mock.failures:
+            raise RuntimeError(f"{len(mock.failures)} failures were never injected")
+        # Concurrent requests print their results in no particular order
+        return len(mock.requests), sorted(printed.getvalue().splitlines()), seconds
+    finally:
+        mock.stop()
+
+
+def check(scenario):
+    """Return the problems of a scenario's run with failures against its run without them."""
+    requests, lines, _ = run_command(scenario.argv, [])
+    failed_requests, failed_lines, seconds = run_command(scenario.argv, scenario.failures)
+    problems = []
+    if failed_requests - requests != scenario.extra_requests:
+        problems.append(f"{failed_requests - requests} extra requests instead of {scenario.extra_requests}")
+    if failed_lines != lines:
+        problems.append("output differs: " + "; ".join(line for line in failed_lines if line not in lines)[:200])
+    if seconds < scenario.min_seconds:
+        problems.append(f"took {seconds:.2f}s, less than {scenario.min_seconds}s")
+    return problems, seconds
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--only", nargs="+", choices=SCENARIOS, help="Run only these scenarios")
+    options = arg_parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    compileall.compile_dir(str(ROOT / "taiga_cli"), quiet=1)
+
+    failed = False
+    print(f"{'SCENARIO':<30}{'TIME':>10}  STATUS")
+    for name, scenario in SCENARIOS.items():
+        if options.only and name not in options.only:
+            continue
+        problems, seconds = check(scenario)
+        failed = failed or bool(problems)
+        print(f"{name:<30}{seconds * 1000:>8.1f}ms  {'FAIL: ' + ', '.join(problems) if problems else 'ok'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""In-process stand-in for the parts of the Taiga REST API the CLI uses.
+
+`build_instance` generates a synthetic Taiga instance and `MockTaiga` serves it
+over HTTP on a local port, with optional per-request latency, pagination and
+ETag validators. It keeps a log of the requests it answered, and can answer
+some of them with injected failures.
+
+Usage: python benchmarks/mock_taiga.py [--projects N] [--sprints M] [--stories K] [--latency SECONDS] [--etags]
+       (prints the URL and serves until killed; GET /_mock/requests returns the request log)
+"""
+import argparse
+import calendar
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def finish_date(milestone, story_id):
+    """Spread the finish dates of closed stories over their sprint, a few landing just after it."""
+    start = calendar.timegm(time.strptime(milestone["estimated_start"], "%Y-%m-%d")) if milestone else 1767225600
+    return time.strftime("%Y-%m-%dT10:00:00+0000", time.gmtime(start + (story_id % 16) * 86400))
+
+
+def build_instance(projects=3, sprints=4, stories=50, users=5, seed=1):
+    """Generate a Taiga instance: `stories` random user stories per project, spread over its sprints and backlog."""
+    rnd = random.Random(seed)
+    data = {"projects": [], "milestones": [], "userstories": [], "users": [], "statuses": []}
+    for user_id in range(1, users + 1):
+        data["users"].append({"id": user_id, "username": f"user{user_id}", "full_name_display": f"User {user_id}"})
+
+    milestone_id = 1
+    story_id = 1
+    for project_id in range(1, projects + 1):
+        data["projects"].append({"id": project_id, "slug": f"proj-{project_id}", "name": f"Project {project_id}",
+                                 "members": list(range(1, users + 1))})
+        data["statuses"].append({"id": project_id * 10, "project": project_id, "is_closed": False, "name": "New"})
+        data["statuses"].append({"id": project_id * 10 + 1, "project": project_id, "is_closed": True, "name": "Done"})
+
+        milestones = []
+        for number in range(1, sprints + 1):
+            start = 14 * (number - 1)
+            milestones.append({
+                "id": milestone_id, "slug": f"sprint-{number}", "name": f"Sprint {number}", "project": project_id,
+                "closed": number < sprints - 1,
+                "estimated_start": time.strftime("%Y-%m-%d", time.gmtime(1767225600 + start * 86400)),
+                "estimated_finish": time.strftime("%Y-%m-%d", time.gmtime(1767225600 + (start + 13) * 86400)),
+            })
+            milestone_id += 1
+        data["milestones"].extend(milestones)
+
+        for _ in range(stories):
+            milestone = rnd.choice(milestones + [None])
+            user = rnd.choice(data["users"] + [None])
+            closed = rnd.random() < 0.4
+            data["userstories"].append({
+                "id": story_id, "ref": story_id, "version": 1, "project": project_id,
+                "subject": f"Story {story_id}",
+                "description": f"Description for story {story_id} lorem ipsum",
+                "tags": [["backend", None]] if story_id % 3 == 0 else [],
+                "milestone": milestone["id"] if milestone else None,
+                "milestone_name": milestone["name"] if milestone else None,
+                "milestone_slug": milestone["slug"] if milestone else None,
+                "is_closed": closed, "status": project_id * 10 + (1 if closed else 0),
+                "total_points": float(rnd.choice([0, 1, 2, 3, 5, 8])),
+                "assigned_to": user["id"] if user else None,
+                "assigned_to_extra_info": ({"username": user["username"], "full_name_display": user["full_name_display"]}
+                                           if user else None),
+                "created_date": "2026-01-01T10:00:00+0000",
+                "modified_date": "2026-01-0%dT10:00:00+0000" % (1 + story_id % 9),
+                "finish_date": finish_date(milestone, story_id) if closed else None,
+            })
+            story_id += 1
+    return data
+
+
+# An error answer to inject: its status, headers, the method of the requests it
+# may answer (None for any) and the JSON body, by default a generic error message
+Failure = namedtuple("Failure", ["status", "headers", "method", "body"], defaults=({}, None, None))
+
+
+class MockTaiga:
+    """Serve a generated instance over HTTP, recording every request."""
+
+    def __init__(self, data=None, latency=0.0, page_size=30, etags=False):
+        self.data = data or build_instance()
+        self.latency = latency
+        self.page_size = page_size
+        self.etags = etags
+        self.requests = []
+        self.not_modified = 0
+        # Failures answered to the next matching requests instead of the real answers, e.g. Failure(503)
+        self.failures = []
+        self.failures_lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+        """Start serving in a background thread and return the base URL."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, body, headers=None):
+                raw = json.dumps(body).encode()
+                headers = dict(headers or {})
+                if status == 200 and mock.etags:
+                    headers["ETag"] = '"%s"' % hashlib.sha1(raw).hexdigest()
+                    if self.headers.get("If-None-Match") == headers["ETag"]:
+                        mock.not_modified += 1
+                        status, raw = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                mock.handle(self, "GET")
+
+            def do_POST(self):
+                mock.handle(self, "POST")
+
+            def do_PATCH(self):
+                mock.handle(self, "PATCH")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        """Stop serving."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def take_failure(self, method):
+        """Remove and return the first injected failure meant for a request of this method, if any."""
+        with self.failures_lock:
+            for index, failure in enumerate(self.failures):
+                if failure.method in (None, method):
+                    return self.failures.pop(index)
+        return None
+
+    def handle(self, handler, method):
+        """Answer one request from the generated data."""
+        url = urlparse(handler.path)
+        if url.path == "/_mock/requests":
+            # Lets the process that started this server elsewhere read the request log
+            return handler.send_json(200, [list(request) for request in self.requests])
+        if self.latency:
+            time.sleep(self.latency)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path[len("/api/v1"):].strip("/")
+        self.requests.append((method, path, query))
+        failure = self.take_failure(method)
+        if failure:
+            return handler.send_json(failure.status, failure.body or {"_error_message": "Injected failure"}, failure.headers)
+
+        body = None
+        if method in ("POST", "PATCH"):
+            length = int(handler.headers.get("Content-Length", 0))
+            body = json.loads(handler.rfile.read(length) or b"{}")
+
+        data = self.data
+        parts = path.split("/")
+        if path in ("auth", "auth/refresh"):
+            return handler.send_json(200, {"auth_token": "token", "refresh": "refresh", "id": 1, "username": "user1"})
+        if path == "users/me":
+            return handler.send_json(200, data["users"][0])
+        if path == "users/by_username":
+            user = next((u for u in data["users"] if u["username"] == query.get("username")), None)
+            return handler.send_json(200, user) if user else handler.send_json(404, {"_error_message": "Not found."})
+        if path == "users":
+            return handler.send_json(200, data["users"])
+        if path == "projects/by_slug":
+            project = next((p for p in data["projects"] if p["slug"] == query.get("slug")), None)
+            return handler.send_json(200, project) if project else handler.send_json(404, {"_error_message": "Not found."})
+        if path == "projects":
+            items = data["projects"]
+            if "member" in query:
+                items = [p for p in items if int(query["member"]) in p["members"]]
+            return self.paginate(handler, items, query)
+        if parts[0] == "projects" and len(parts) >= 2:
+            project = next((p for p in data["projects"] if p["id"] == int(parts[1])), None)
+            if project is None:
+                return handler.send_json(404, {})
+            if len(parts) == 3 and parts[2] == "stats":
+                return handler.send_json(200, self.project_stats(project))
+            return handler.send_json(200, project)
+        if path == "userstory-statuses":
+            return handler.send_json(200, [s for s in data["statuses"] if s["project"] == int(query["project"])])
+        if path == "milestones":
+            items = [m for m in data["milestones"] if "project" not in query or m["project"] == int(query["project"])]
+            if "closed" in query:
+                items = [m for m in items if m["closed"] == (query["closed"].lower() == "true")]
+            items = [dict(m, user_stories=self.milestone_stories(m)) for m in items]
+            return self.paginate(handler, items, query)
+        if parts[0] == "milestones" and len(parts) >= 2:
+            milestone = next((m for m in data["milestones"] if m["id"] == int(parts[1])), None)
+            if milestone is None:
+                return handler.send_json(404, {})
+            if len(parts) == 3 and parts[2] == "stats":
+                return handler.send_json(200, self.milestone_stats(milestone))
+            return handler.send_json(200, dict(milestone, user_stories=self.milestone_stories(milestone)))
+        if path == "userstories/bulk_update_milestone" and method == "POST":
+            ids = {entry["us_id"] for entry in body["bulk_stories"]}
+            milestone = next(m for m in data["milestones"] if m["id"] == body["milestone_id"])
+            for story in data["userstories"]:
+                if story["id"] in ids:
+                    story.update(milestone=milestone["id"], milestone_name=milestone["name"],
+                                 milestone_slug=milestone["slug"], version=story["version"] + 1)
+            return handler.send_json(200, {})
+        if path == "userstories":
+            return self.paginate(handler, self.filter_stories(query), query)
+        if parts[0] == "userstories" and len(parts) == 2:
+            story = next((s for s in data["userstories"] if s["id"] == int(parts[1])), None)
+            if story is None:
+                return handler.send_json(404, {})
+            if method == "PATCH":
+                if body.get("version", story["version"]) != story["version"]:
+                    return handler.send_json(400, {"version": "The version doesn't match with the current one"})
+                body.pop("version", None)
+                story.update(body)
+                story["version"] += 1
+                if "status" in body:
+                    story["is_closed"] = body["status"] % 10 == 1
+                if "assigned_to" in body:
+                    user = next((u for u in data["users"] if u["id"] == body["assigned_to"]), None)
+                    story["assigned_to_extra_info"] = (
+                        {"username": user["username"], "full_name_display": user["full_name_display"]} if user else None)
+            return handler.send_json(200, story)
+        return handler.send_json(404, {"_error_message": f"Unknown endpoint {path}"})
+
+    def filter_stories(self, query):
+        """Apply the user story filters the CLI sends."""
+        items = self.data["userstories"]
+        for key in ("project", "milestone", "assigned_to"):
+            if key in query:
+                items = [s for s in items if str(s[key]) == query[key] or (s[key] is None and query[key] == "null")]
+        if "is_closed" in query:
+            items = [s for s in items if s["is_closed"] == (query["is_closed"].lower() == "true")]
+        if "milestone__isnull" in query:
+            items = [s for s in items if (s["milestone"] is None) == (query["milestone__isnull"].lower() == "true")]
+        if "modified_date__gt" in query:
+            items = [s for s in items if s["modified_date"] > query["modified_date__gt"]]
+        return items
+
+    def milestone_stories(self, milestone):
+        return [s for s in self.data["userstories"] if s["milestone"] == milestone["id"]]
+
+    def milestone_stats(self, milestone):
+        stories = self.milestone_stories(milestone)
+        return {
+            "name": milestone["name"],
+            "estimated_start": milestone["estimated_start"],
+            "estimated_finish": milestone["estimated_finish"],
+            "total_userstories": len(stories),
+            "completed_userstories": sum(1 for s in stories if s["is_closed"]),
+            "total_points": {"1": sum(s["total_points"] for s in stories)},
+            "completed_points": [sum(s["total_points"] for s in stories if s["is_closed"])],
+        }
+
+    def project_stats(self, project):
+        stories = [s for s in self.data["userstories"] if s["project"] == project["id"]]
+        return {
+            "name": project["name"],
+            "total_milestones": sum(1 for m in self.data["milestones"] if m["project"] == project["id"]),
+            "total_points": sum(s["total_points"] for s in stories),
+            "closed_points": sum(s["total_points"] for s in stories if s["is_closed"]),
+            "defined_points": sum(s["total_points"] for s in stories),
+            "assigned_points": sum(s["total_points"] for s in stories if s["milestone"]),
+        }
+
+    def paginate(self, handler, items, query):
+        """Answer a list with Taiga's pagination headers, unless pagination is disabled."""
+        if handler.headers.get("x-disable-pagination"):
+            return handler.send_json(200, items)
+        size = int(query.get("page_size", self.page_size))
+        page = int(query.get("page", 1))
+        headers = {"x-pagination-count": str(len(items)), "x-paginated": "true", "x-paginated-by": str(size),
+                   "x-pagination-current": str(page)}
+        if page * size < len(items):
+            headers["x-pagination-next"] = f"page={page + 1}"
+        return handler.send_json(200, items[(page - 1) * size: page * size], headers)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--projects", type=int, default=3)
+    arg_parser.add_argument("--sprints", type=int, default=4)
+    arg_parser.add_argument("--stories", type=int, default=50, help="Stories per project")
+    arg_parser.add_argument("--users", type=int, default=5)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    arg_parser.add_argument("--etags", action="store_true", help="Send ETag validators and answer 304")
+    options = arg_parser.parse_args()
+
+    data = build_instance(options.projects, options.sprints, options.stories, options.users)
+    server = MockTaiga(data, latency=options.latency, etags=options.etags)
+    print(server.start(), flush=True)
+    while True:
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Benchmark suite: run CLI commands against a local mock Taiga server.
+
+Each scenario runs a command in this process against a synthetic instance
+served by `mock_taiga.py` (started as a separate process, so its own work is
+neither timed nor counted as memory), starting from an empty config
+directory (cold caches). It measures the median wall time, the requests the
+server received and the peak memory allocated by Python, the latter in an
+extra run under tracemalloc. Results are compared with `baselines.json`;
+more requests than the baseline, or time or memory beyond the tolerance,
+fail the run.
+
+Usage: python benchmarks/run.py [--projects N] [--sprints M] [--stories K]
+                                [--latency SECONDS] [--repeat R] [--only NAME ...]
+                                [--update] [--tolerance FRACTION]
+"""
+import argparse
+import compileall
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from urllib.request import urlopen
+
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCHMARKS = Path(__file__).resolve().parent
+BASELINES_FILE = BENCHMARKS / "baselines.json"
+
+# Scenario name -> command line, run with the default project and sprint configured
+SCENARIOS = {
+    "project-ls": ["project", "ls"],
+    "stories-ls": ["stories", "ls", "--all-users"],
+    "stories-ls-all-sprints": ["stories", "ls", "--all-sprints", "--all-users"],
+    "stories-stats": ["stories", "stats", "--all-users"],
+    "stories-stats-all-sprints": ["stories", "stats", "--all-sprints", "--all-users"],
+    "stories-stats-all-projects": ["stories", "stats", "--all-projects", "--all-users"],
+    "sprint-user-stats": ["sprint", "user-stats"],
+    "sprint-user-stats-all-users": ["sprint", "user-stats", "--all-users"],
+    "workload-all-projects": ["workload", "--all-projects"],
+}
+
+# Memory may grow this much over the baseline before the run fails
+MEMORY_TOLERANCE = 0.25
+
+# Time differences below this many seconds are never reported as regressions
+TIME_SLACK = 0.05
+
+
+def prepare_home(api_url):
+    """Create a config directory for the mock server with a valid token and return HOME."""
+    home = tempfile.mkdtemp(prefix="taiga-bench-")
+    config_dir = Path(home) / ".config" / "taiga-cli"
+    config_dir.mkdir(parents=True)
+    (config_dir / "config.json").write_text(json.dumps({
+        "api_url": api_url, "username": "user1", "default_project": "proj-1", "default_sprint": "sprint-1",
+    }))
+    expiration = datetime.datetime.now() + datetime.timedelta(hours=1)
+    (config_dir / "token.json").write_text(json.dumps({"token": "token", "expiration": expiration.isoformat()}))
+    return home
+
+
+def start_server(options):
+    """Start the mock server for the requested instance and return (process, URL)."""
+    process = subprocess.Popen(
+        [sys.executable, str(BENCHMARKS / "mock_taiga.py"), "--projects", str(options.projects),
+         "--sprints", str(options.sprints), "--stories", str(options.stories), "--latency", str(options.latency)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    return process, process.stdout.readline().strip()
+
+
+def request_count(api_url):
+    """Return how many API requests the mock server answered so far."""
+    with urlopen(f"{api_url}/_mock/requests") as response:
+        return len(json.load(response))
+
+
+def run_command(argv, api_url, trace_memory=False):
+    """Run a CLI command in this process with fresh CLI modules and an empty cache.
+
+    Returns the elapsed seconds, or the peak of traced memory in bytes with `trace_memory`.
+    """
+    os.environ["HOME"] = prepare_home(api_url)
+    # Module-level state (the API client, caches, the parser) must not leak between runs
+    for name in [name for name in sys.modules if name.startswith("taiga_cli")]:
+        del sys.modules[name]
+    from taiga_cli.main import dispatch
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        dispatch(argv)
+        seconds = time.perf_counter() - started
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak
+    return seconds
+
+
+def measure(argv, api_url, repeat):
+    """Return the median time, the requests of one run and the peak memory of a command."""
+    run_command(argv, api_url)  # Warm up imports of the HTTP stack
+    before = request_count(api_url)
+    times = [run_command(argv, api_url) for _ in range(repeat)]
+    requests = (request_count(api_url) - before) // repeat
+    peak = run_command(argv, api_url, trace_memory=True)
+    return {"seconds": round(statistics.median(times), 4), "requests": requests, "peak_kib": round(peak / 1024)}
+
+
+def compare(result, baseline, tolerance):
+    """Return the regressions of a result against its baseline."""
+    problems = []
+    if result["requests"] > baseline["requests"]:
+        problems.append(f"requests {baseline['requests']} -> {result['requests']}")
+    if result["seconds"] > baseline["seconds"] * (1 + tolerance) + TIME_SLACK:
+        problems.append(f"time {baseline['seconds']:.3f}s -> {result['seconds']:.3f}s")
+    if result["peak_kib"] > baseline["peak_kib"] * (1 + MEMORY_TOLERANCE):
+        problems.append(f"memory {baseline['peak_kib']} KiB -> {result['peak_kib']} KiB")
+    return problems
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--projects", type=int, default=3)
+    arg_parser.add_argument("--sprints", type=int, default=6)
+    arg_parser.add_argument("--stories", type=int, default=300, help="Stories per project")
+    arg_parser.add_argument("--latency", type=float, default=0.005, help="Seconds added to every response")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--only", nargs="+", choices=SCENARIOS, help="Run only these scenarios")
+    arg_parser.add_argument("--update", action="store_true", help="Store the results as the new baselines")
+    arg_parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown (default 0.5)")
+    options = arg_parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    # Stale bytecode would be compiled again on every import, which measures the compiler, not the CLI
+    compileall.compile_dir(str(ROOT / "taiga_cli"), quiet=1)
+    instance = {"projects": options.projects, "sprints": options.sprints, "stories": options.stories,
+                "latency": options.latency}
+    server, api_url = start_server(options)
+
+    stored = json.loads(BASELINES_FILE.read_text()) if BASELINES_FILE.exists() else {}
+    baselines = stored.get("results", {}) if stored.get("instance") == instance else {}
+    if stored and not baselines:
+        print("Baselines were recorded for another instance size; results are not compared.")
+
+    results = dict(stored.get("results", {})) if options.update and baselines else {}
+    failed = False
+    print(f"{'SCENARIO':<30}{'TIME':>10}{'REQUESTS':>10}{'PEAK':>12}  STATUS")
+    try:
+        for name, argv in SCENARIOS.items():
+            if options.only and name not in options.only:
+                continue
+            result = measure(argv, api_url, options.repeat)
+            results[name] = result
+            status = "new"
+            if name in baselines:
+                problems = compare(result, baselines[name], options.tolerance)
+                status = "FAIL: " + ", ".join(problems) if problems else "ok"
+                failed = failed or bool(problems)
+            print(f"{name:<30}{result['seconds'] * 1000:>8.1f}ms{result['requests']:>10}"
+                  f"{result['peak_kib']:>8} KiB  {status}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    if options.update:
+        BASELINES_FILE.write_text(json.dumps({"instance": instance, "results": results}, indent=4) + "\n")
+        print(f"Baselines written to {BASELINES_FILE.name}.")
+    sys.exit(1 if failed and not options.update else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Startup regression check for commands that only read the local configuration.
+
+Runs each command in a fresh interpreter under `python -X importtime` and fails
+if it loads the Taiga client or its HTTP stack, or if the modules it imports on
+top of a bare interpreter take longer than the budget.
+
+Usage: python benchmarks/startup.py [--budget-ms N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Packages that must only be loaded by commands that talk to the server
+NETWORK_PACKAGES = ("taiga", "requests", "urllib3")
+
+OFFLINE_COMMANDS = (
+    ["--version"],
+    ["project", "default"],
+    ["sprint", "default"],
+    ["__complete", "sprint", ""],
+)
+
+# Import time allowed per command on top of a bare interpreter, in milliseconds
+DEFAULT_BUDGET_MS = 40
+
+
+def import_profile(argv, home):
+    """Run the CLI with `argv` (or a bare interpreter if None) and return {module: self import time in us}."""
+    code = "pass"
+    if argv is not None:
+        code = f"import sys; sys.argv = ['taiga', *{argv!r}]; from taiga_cli.main import main; main()"
+    env = {**os.environ, "HOME": home, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    options = arg_parser.parse_args()
+
+    home = tempfile.mkdtemp()
+    config_dir = Path(home) / ".config" / "taiga-cli"
+    config_dir.mkdir(parents=True)
+    with (config_dir / "config.json").open("w") as config_file:
+        json.dump({"api_url": "https://taiga.invalid", "username": "bench",
+                   "default_project": "project", "default_sprint": "sprint"}, config_file)
+
+    interpreter = import_profile(None, home)
+    failed = False
+    for argv in OFFLINE_COMMANDS:
+        modules = {name: us for name, us in import_profile(argv, home).items() if name not in interpreter}
+        total_ms = sum(modules.values()) / 1000
+        loaded = sorted(name for name in modules if name.split(".")[0] in NETWORK_PACKAGES)
+        status = "ok"
+        if loaded:
+            status = f"FAIL: loaded {', '.join(loaded[:5])}"
+            failed = True
+        elif total_ms > options.budget_ms:
+            status = f"FAIL: over budget of {options.budget_ms:.0f} ms"
+            failed = True
+        print(f"taiga {' '.join(argv):<20} {total_ms:7.1f} ms  {len(modules):4d} modules  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from taiga_cli import profiling
+
+
+# Counters computed for every story group: (name, value the story adds to it).
+# A new metric only needs a new entry here; it is computed in the same pass.
+STORY_METRICS = (
+    ("stories", lambda story: 1),
+    ("open_stories", lambda story: 0 if story.is_closed else 1),
+    ("closed_stories", lambda story: 1 if story.is_closed else 0),
+    ("points", lambda story: story.total_points or 0),
+    ("open_points", lambda story: 0 if story.is_closed else story.total_points or 0),
+)
+
+
+def sprint_key(story):
+    """Group stories by sprint name."""
+    return story.milestone_name or "Backlog"
+
+
+def user_key(story):
+    """Group stories by assigned username."""
+    return story.assigned_username or "Unassigned"
+
+
+def new_counters(metrics=STORY_METRICS):
+    """Return a zeroed counter set for the given metrics."""
+    return {name: 0 for name, _ in metrics}
+
+
+def aggregate(stories, metrics=STORY_METRICS, **groupings):
+    """Compute every metric overall and per group in a single pass over a story stream.
+
+    Each keyword argument names a grouping and gives the function that returns
+    a story's group key, e.g. `aggregate(stories, sprint=sprint_key)`. Stories
+    are not kept; the result only holds counters:
+
+        {"total": counters, "sprint": {"Sprint 1": counters, ...}}
+    """
+    result = {"total": new_counters(metrics)}
+    for grouping in groupings:
+        result[grouping] = {}
+
+    with profiling.phase("aggregate"):
+        for story in stories:
+            values = [(name, value(story)) for name, value in metrics]
+            targets = [result["total"]]
+            for grouping, key in groupings.items():
+                groups = result[grouping]
+                group = key(story)
+                if group not in groups:
+                    groups[group] = new_counters(metrics)
+                targets.append(groups[group])
+
+            for counters in targets:
+                for name, value in values:
+                    counters[name] += value
+
+    return result
+
+
+def points_sum(points):
+    """Add up points the server reports per role, as a dict or a list, or as a single number."""
+    if isinstance(points, dict):
+        points = list(points.values())
+    if isinstance(points, list):
+        return sum(value or 0 for value in points)
+    return points or 0
+
+
+def stats_counters(stats):
+    """Build the counters of `STORY_METRICS` from a milestone's stats, as computed by the server."""
+    stories = stats.get("total_userstories") or 0
+    closed = stats.get("completed_userstories") or 0
+    points = points_sum(stats.get("total_points"))
+    return {
+        "stories": stories,
+        "open_stories": stories - closed,
+        "closed_stories": closed,
+        "points": points,
+        "open_points": points - points_sum(stats.get("completed_points")),
+    }
+
+
+def progress(counters):
+    """Return the percentage of closed stories in a counter set."""
+    return (counters["closed_stories"] / counters["stories"] * 100) if counters["stories"] > 0 else 0
@@ -0,0 +1,63 @@
+import time
+from taiga_cli import query, records
+from taiga_cli.concurrency import map_as_completed
+
+
+# Stories updated at the same time when there is no bulk endpoint for a change
+PATCH_WORKERS = 8
+
+# Attempts per story before its update is reported as failed
+MAX_ATTEMPTS = 4
+
+
+def is_version_conflict(error):
+    """Return whether an update was rejected because the story changed since it was read."""
+    return error.status_code == 400 and "version" in str(error)
+
+
+def move_to_sprint(api, project_id, milestone_id, stories):
+    """Move stories to a sprint with a single `bulk_update_milestone` request."""
+    api.raw_request.post("userstories/bulk_update_milestone", payload={
+        "project_id": project_id,
+        "milestone_id": milestone_id,
+        "bulk_stories": [{"us_id": story.id, "order": order} for order, story in enumerate(stories)],
+    })
+
+
+def patch_story(api, story, changes):
+    """Apply changes to a story and return its updated record.
+
+    PATCH is not idempotent, so the transport only retries it on 429. Server
+    and network errors are retried here: should an earlier attempt have gone
+    through after all, the next one fails with a version conflict, and as for
+    any story modified since it was read, its current version is fetched and
+    the changes are applied on top of it.
+    """
+    from taiga.exceptions import TaigaRestException
+    from taiga_cli.transport import RETRY_STATUSES, retry_delay
+
+    version = story.version
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            response = api.raw_request.patch(f"userstories/{story.id}", payload={**changes, "version": version})
+            return records.story(response.json())
+        except TaigaRestException as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            if is_version_conflict(e):
+                version = query.fetch_one(api, f"userstories/{story.id}")["version"]
+            elif e.status_code in RETRY_STATUSES or str(e) == "Network error!":
+                time.sleep(retry_delay(attempt))
+            else:
+                raise
+
+
+def patch_stories(api, stories, changes):
+    """Apply the same changes to many stories concurrently, yielding `(story, updated record or exception)`."""
+    def update(story):
+        try:
+            return patch_story(api, story, changes)
+        except Exception as e:
+            return e
+
+    yield from map_as_completed(update, stories, max_workers=PATCH_WORKERS)
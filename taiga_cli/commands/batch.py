@@ -0,0 +1,57 @@
+import shlex
+import sys
+from taiga_cli import output
+
+
+def parse_command(line):
+    """Split a batch line into arguments, dropping a leading `taiga`."""
+    argv = shlex.split(line)
+    if argv and argv[0] == "taiga":
+        argv = argv[1:]
+    return argv
+
+
+def run_batch(lines):
+    """Run every command of a batch in this process, sharing the API client and the resolved slugs."""
+    # Imported here since main imports this module on demand
+    from taiga_cli.main import dispatch
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        print(f"$ {line}")
+        try:
+            argv = parse_command(line)
+        except ValueError as e:
+            output.error(f"Error parsing command: {e}")
+            argv = None
+
+        if argv and argv[0] == "batch":
+            output.error("Error: batches cannot be nested.")
+        elif argv is not None:
+            try:
+                dispatch(argv)
+            except SystemExit:
+                # argparse exits on invalid arguments; the rest of the batch still runs
+                pass
+            except Exception as e:
+                # A failing command must not abort the commands after it
+                output.error(f"Error running command: {e}")
+        print()
+        sys.stdout.flush()
+
+
+def run(args):
+    """Handle the `taiga batch` command."""
+    path = args[0] if args else "-"
+    if path == "-":
+        run_batch(sys.stdin)
+        return
+
+    try:
+        with open(path, 'r') as batch_file:
+            run_batch(batch_file)
+    except OSError as e:
+        output.error(f"Error reading batch file: {e}")
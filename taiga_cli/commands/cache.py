@@ -0,0 +1,224 @@
+import json
+import threading
+import time
+from collections import namedtuple
+from taiga_cli.commands.config import CONFIG_DIR, load_config, write_json
+from taiga_cli.commands.login import get_api_instance
+from taiga_cli.cliparser import parser
+from taiga_cli import output, query
+
+
+CACHE_FILE = CONFIG_DIR / "cache.json"
+
+# Seconds an entry stays valid, overridable per entity with "cache_ttl" in config.json
+DEFAULT_TTLS = {
+    "projects": 24 * 60 * 60,
+    "sprints": 60 * 60,
+    "users": 24 * 60 * 60,
+}
+
+Ref = namedtuple("Ref", ["id", "slug", "name"])
+
+_cache = None
+_cache_lock = threading.RLock()
+
+# ID of the authenticated user, asked once per process
+_me_id = None
+
+
+def load_cache():
+    """Load the slug index, discarding it if it belongs to another server."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            api_url = load_config().get("api_url")
+            data = {}
+            if CACHE_FILE.exists():
+                try:
+                    with CACHE_FILE.open('r') as cache_file:
+                        data = json.load(cache_file)
+                except ValueError:
+                    data = {}
+            if data.get("api_url") != api_url:
+                data = {"api_url": api_url}
+            _cache = data
+        return _cache
+
+
+def save_cache():
+    """Save the slug index to disk."""
+    with _cache_lock:
+        write_json(CACHE_FILE, load_cache())
+
+
+def get_ttl(entity):
+    """Return the time-to-live in seconds for an entity kind."""
+    overrides = load_config().get("cache_ttl", {})
+    return overrides.get(entity, DEFAULT_TTLS[entity])
+
+
+def lookup(entity, key):
+    """Return the cached reference for a key, or None if missing or expired."""
+    entry = load_cache().get(entity, {}).get(key)
+    if not entry or time.time() - entry["cached_at"] > get_ttl(entity):
+        return None
+    return Ref(entry["id"], entry["slug"], entry["name"])
+
+
+def store(entity, key, ref):
+    """Record a reference in the in-memory index (call `save_cache` to persist)."""
+    with _cache_lock:
+        load_cache().setdefault(entity, {})[key] = {
+            "id": ref.id,
+            "slug": ref.slug,
+            "name": ref.name,
+            "cached_at": time.time(),
+        }
+
+
+def resolve_project(api, project_slug):
+    """Resolve a project slug to a reference, asking the server by slug on a miss."""
+    project = lookup("projects", project_slug)
+    if project:
+        return project
+
+    found = query.get_project_by_slug(api, project_slug)
+    if not found:
+        return None
+
+    project = Ref(found.id, found.slug, found.name)
+    store("projects", project_slug, project)
+    save_cache()
+    return project
+
+
+def resolve_sprint(api, project, sprint_slug):
+    """Resolve a sprint slug within a project, indexing the project sprints on a miss.
+
+    Open sprints are asked for first, closed ones only if the slug is not among them.
+    """
+    key = f"{project.id}/{sprint_slug}"
+    sprint = lookup("sprints", key)
+    if sprint:
+        return sprint
+
+    for closed in (False, True):
+        for milestone in query.list_milestones(api, project.id, closed=closed):
+            store("sprints", f"{project.id}/{milestone.slug}", Ref(milestone.id, milestone.slug, milestone.name))
+        save_cache()
+        sprint = lookup("sprints", key)
+        if sprint:
+            return sprint
+    return None
+
+
+def project_sprints(api, project, refresh=False):
+    """Return references to every sprint of a project, indexing them if the index is stale."""
+    prefix = f"{project.id}/"
+    indexed_at = load_cache().get("sprint_index", {}).get(str(project.id), 0)
+    if not refresh and time.time() - indexed_at <= get_ttl("sprints"):
+        sprints = [lookup("sprints", key) for key in list(load_cache().get("sprints", {})) if key.startswith(prefix)]
+        return [sprint for sprint in sprints if sprint]
+
+    sprints = []
+    for milestone in query.iter_milestones(api, project=project.id):
+        sprint = Ref(milestone.id, milestone.slug, milestone.name)
+        store("sprints", f"{project.id}/{milestone.slug}", sprint)
+        sprints.append(sprint)
+    with _cache_lock:
+        load_cache().setdefault("sprint_index", {})[str(project.id)] = time.time()
+    save_cache()
+    return sprints
+
+
+def resolve_user(api, username):
+    """Resolve a username to a reference, asking the server by username on a miss."""
+    user = lookup("users", username)
+    if user:
+        return user
+
+    found = query.get_user_by_username(api, username)
+    if not found:
+        return None
+
+    user = Ref(found.id, found.username, found.full_name_display or found.username)
+    store("users", username, user)
+    save_cache()
+    return user
+
+
+def resolve_assignee(api, username=None):
+    """Resolve the `assigned_to` filter value for a username, defaulting to the current user."""
+    global _me_id
+    if username is None:
+        if _me_id is None:
+            _me_id = api.me().id
+        return _me_id
+    if username == "Unassigned":
+        return "null"
+    user = resolve_user(api, username)
+    if not user:
+        raise ValueError(f"User '{username}' not found.")
+    return user.id
+
+
+def clear_cache():
+    """Drop every cached entry and stored response."""
+    global _cache
+    with _cache_lock:
+        _cache = None
+        if CACHE_FILE.exists():
+            CACHE_FILE.unlink()
+
+    # Imported here since it pulls in hashlib, which slug lookups never need
+    from taiga_cli import http_cache
+    http_cache.clear()
+
+
+def refresh_cache():
+    """Rebuild the index from the user's projects and the default project's sprints."""
+    api = get_api_instance()
+    if not api:
+        output.error("Unable to authenticate. Please log in using `taiga login`.")
+        return
+
+    clear_cache()
+    try:
+        me = api.me()
+        store("users", me.username, Ref(me.id, me.username, me.full_name_display))
+
+        projects = api.projects.list(member=me.id, slight=True)
+        for project in projects:
+            store("projects", project.slug, Ref(project.id, project.slug, project.name))
+
+        default_project = load_config().get("default_project")
+        project = lookup("projects", default_project) if default_project else None
+        if project:
+            for milestone in query.iter_milestones(api, project=project.id):
+                store("sprints", f"{project.id}/{milestone.slug}", Ref(milestone.id, milestone.slug, milestone.name))
+            for user in api.users.list(project=project.id):
+                store("users", user.username, Ref(user.id, user.username, user.full_name_display))
+
+        save_cache()
+        cached = load_cache()
+        print(f"Cache refreshed: {len(cached.get('projects', {}))} projects, "
+              f"{len(cached.get('sprints', {}))} sprints, {len(cached.get('users', {}))} users.")
+    except Exception as e:
+        output.error(f"Error refreshing cache: {e}")
+
+
+def run(args):
+    """Handle the `taiga cache` command."""
+    if len(args) < 1:
+        parser.print_help()
+        return
+
+    command = args[0]
+
+    if command == "clear":
+        clear_cache()
+        print("Cache cleared.")
+    elif command == "refresh":
+        refresh_cache()
+    else:
+        parser.print_help()
@@ -0,0 +1,261 @@
+import json
+import sys
+import time
+from taiga_cli.commands.config import CONFIG_DIR, list_instances, load_config, write_json
+from taiga_cli.cliparser import parser
+from taiga_cli import output
+
+
+SLUGS_FILE = CONFIG_DIR / "completion.json"
+REFRESH_MARKER = CONFIG_DIR / "completion.refreshing"
+
+# Seconds before the slugs are refreshed in the background, overridable with "cache_ttl": {"completion": N}
+DEFAULT_TTL = 24 * 60 * 60
+
+# A refresh still marked as running after this many seconds is assumed to have died
+REFRESH_TIMEOUT = 5 * 60
+
+# Projects whose sprints and members are fetched at the same time by a refresh
+PROJECT_WORKERS = 4
+
+# Subcommands of each command; argparse only sees them as free positional words
+SUBCOMMANDS = {
+    "project": ("ls", "default", "set-default"),
+    "sprint": ("ls", "default", "set-default", "user-stats", "user-stories", "burndown", "velocity"),
+    "stories": ("ls", "stats", "stats-detailed", "search", "move", "close", "assign"),
+    "cache": ("clear", "refresh"),
+    "daemon": ("start", "stop", "status"),
+    "completion": ("bash", "zsh", "fish", "refresh"),
+}
+
+# Destination of each option whose value is a slug -> the list of slugs it takes
+SLUG_OPTIONS = {
+    "project": "projects",
+    "sprint": "sprints",
+    "to_sprint": "sprints",
+    "user": "users",
+    "to_user": "users",
+}
+
+SCRIPTS = {
+    "bash": """_taiga_complete() {
+    local IFS=$'\\n'
+    COMPREPLY=($(taiga __complete "${COMP_WORDS[@]:1:COMP_CWORD}" 2>/dev/null))
+}
+complete -o default -F _taiga_complete taiga
+""",
+    "zsh": """#compdef taiga
+_taiga() {
+    local -a candidates
+    candidates=("${(@f)$(taiga __complete "${(@)words[2,CURRENT]}" 2>/dev/null)}")
+    compadd -- "${(@)candidates:#}"
+}
+compdef _taiga taiga
+""",
+    "fish": """function __taiga_complete
+    taiga __complete (commandline -opc)[2..-1] (commandline -ct) 2>/dev/null
+end
+complete -c taiga -f -a '(__taiga_complete)'
+""",
+}
+
+
+def load_slugs():
+    """Load the slug lists, or empty ones if they were never refreshed or belong to another server."""
+    try:
+        with SLUGS_FILE.open('r') as slugs_file:
+            slugs = json.load(slugs_file)
+    except (OSError, ValueError):
+        return {}
+    return slugs if slugs.get("api_url") == load_config().get("api_url") else {}
+
+
+def refresh_in_background(slugs):
+    """Start a refresh of the slug lists in a separate process once they are older than their TTL.
+
+    Completion answers from the lists it has meanwhile, so a TAB never waits for the server.
+    """
+    config = load_config()
+    ttl = config.get("cache_ttl", {}).get("completion", DEFAULT_TTL)
+    if not config or time.time() - slugs.get("refreshed_at", 0) <= ttl:
+        return
+    try:
+        if time.time() - REFRESH_MARKER.stat().st_mtime < REFRESH_TIMEOUT:
+            return
+    except OSError:
+        pass
+    REFRESH_MARKER.touch()
+
+    # Imported here since a TAB only needs it about once a day
+    import subprocess
+    subprocess.Popen(
+        [sys.executable, "-m", "taiga_cli.commands.completion"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def refresh_slugs():
+    """Download the slugs of the user's projects and of their sprints and members, and store them."""
+    from taiga_cli.commands.login import get_api_instance
+    from taiga_cli.commands.project import fetch_projects
+    from taiga_cli.concurrency import map_as_completed
+    from taiga_cli import query
+
+    api = get_api_instance()
+    if not api:
+        raise RuntimeError("Unable to authenticate. Please log in using `taiga login`.")
+
+    def fetch(project):
+        sprints = [milestone["slug"] for page in query.iter_pages(api, "milestones", project=project.id) for milestone in page]
+        users = [user["username"] for page in query.iter_pages(api, "users", project=project.id) for user in page]
+        return sprints, users
+
+    projects = fetch_projects(api, user_only=True)
+    slugs = {"api_url": load_config().get("api_url"), "refreshed_at": time.time(),
+             "projects": [project.slug for project in projects], "sprints": {}, "users": []}
+    users = set()
+    for project, (sprints, project_users) in map_as_completed(fetch, projects, max_workers=PROJECT_WORKERS):
+        slugs["sprints"][project.slug] = sprints
+        users.update(project_users)
+    slugs["users"] = sorted(users)
+    write_json(SLUGS_FILE, slugs)
+    return slugs
+
+
+def join_assignments(words):
+    """Rejoin `--option=value` words that bash splits at the `=` into one word."""
+    joined = []
+    for word in words:
+        if joined and (word == "=" or joined[-1].endswith("=")) and joined[-1].startswith("--"):
+            joined[-1] += word
+        else:
+            joined.append(word)
+    return joined
+
+
+def option_actions(arg_parser):
+    """Map every option string of a parser to its argparse action."""
+    return {option: action for action in arg_parser._actions for option in action.option_strings}
+
+
+def command_parsers(arg_parser):
+    """Return the parser of every command, by name."""
+    for action in arg_parser._actions:
+        if action.choices and action.dest == "command":
+            return action.choices
+    return {}
+
+
+def project_of(words):
+    """Return the project a command line is about: its `--project`, or the default project."""
+    for index, word in enumerate(words):
+        if word.startswith("--project="):
+            return word[len("--project="):]
+        if word == "--project" and index + 1 < len(words):
+            return words[index + 1]
+    return load_config().get("default_project")
+
+
+def option_values(action, words, slugs):
+    """Return the values an option takes: its choices, or the cached slugs of its kind."""
+    if action.choices:
+        return list(action.choices)
+    if action.dest == "instance":
+        return list_instances()
+    kind = SLUG_OPTIONS.get(action.dest)
+    if kind == "sprints":
+        return slugs.get("sprints", {}).get(project_of(words), [])
+    if kind == "users":
+        return [*slugs.get("users", []), "Unassigned"]
+    if kind:
+        return slugs.get(kind, [])
+    return []
+
+
+def completions(words, slugs):
+    """Return the candidates for the last word of a command line given without the program name."""
+    # Bash passes `--option=value` as three words, and replaces only the part after the `=`
+    split_assignment = bool(words) and (words[-1] == "=" or len(words) > 1 and words[-2] == "=")
+    words = join_assignments(words) or [""]
+    *before, current = words
+
+    from taiga_cli.main import build_parser
+    arg_parser = build_parser()
+    commands = command_parsers(arg_parser)
+
+    active, command, positionals, expecting = arg_parser, None, [], None
+    for word in before:
+        if expecting:
+            expecting = None
+        elif word.startswith("-"):
+            action = option_actions(active).get(word)
+            if action and action.nargs != 0:
+                expecting = action
+        elif command is None and word in commands:
+            command, active = word, commands[word]
+        else:
+            positionals.append(word)
+
+    if expecting:
+        candidates = option_values(expecting, words, slugs)
+    elif current.startswith("--") and "=" in current:
+        option, current = current.split("=", 1)
+        action = option_actions(active).get(option)
+        candidates = option_values(action, words, slugs) if action else []
+        if not split_assignment:
+            return [f"{option}={value}" for value in candidates if value.startswith(current)]
+    elif current.startswith("-"):
+        candidates = sorted(option_actions(active))
+    elif command is None:
+        candidates = list(commands)
+    elif not positionals:
+        candidates = SUBCOMMANDS.get(command, ())
+    else:
+        candidates = []
+    return [value for value in candidates if value.startswith(current)]
+
+
+def complete(words):
+    """Print the completions of a command line, one per line, from the locally cached slugs only."""
+    slugs = load_slugs()
+    for candidate in completions(words, slugs):
+        print(candidate)
+    refresh_in_background(slugs)
+
+
+def print_script(shell):
+    """Print the completion script of a shell."""
+    print(SCRIPTS[shell], end="")
+
+
+def run(args):
+    """Handle the `taiga completion` command."""
+    if len(args) < 1:
+        parser.print_help()
+        return
+
+    command = args[0]
+
+    if command in SCRIPTS:
+        print_script(command)
+    elif command == "refresh":
+        try:
+            slugs = refresh_slugs()
+            print(f"Completion refreshed: {len(slugs['projects'])} projects, "
+                  f"{sum(map(len, slugs['sprints'].values()))} sprints, {len(slugs['users'])} users.")
+        except Exception as e:
+            output.error(f"Error refreshing completion: {e}")
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    # Background refresh started by `refresh_in_background`
+    try:
+        refresh_slugs()
+    finally:
+        if REFRESH_MARKER.exists():
+            REFRESH_MARKER.unlink()
@@ -1,22 +1,50 @@
 import os
 import json
 from getpass import getpass
-from taiga import TaigaAPI
 from pathlib import Path
-import platform
+import sys
+import threading
+from taiga_cli.instances import DEFAULT_INSTANCE, INSTANCE_VARIABLE
+from taiga_cli import output
 
 
-def get_config_dir():
+def get_base_dir():
     """Determine the appropriate configuration directory based on the OS."""
-    if platform.system() == "Darwin":  # macOS
+    if sys.platform == "darwin":  # macOS
         return Path.home() / "Library" / "Application Support" / "taiga-cli"
     else:  # Default for Linux and others
         return Path.home() / ".config" / "taiga-cli"
 
 
+def get_config_dir():
+    """Return the directory of the selected instance.
+
+    The default instance lives in the base directory; every named one has
+    its own directory under `instances/`, with its own configuration, token
+    and caches.
+    """
+    instance = os.environ.get(INSTANCE_VARIABLE)
+    if not instance or instance == DEFAULT_INSTANCE:
+        return BASE_DIR
+    return INSTANCES_DIR / instance
+
+
+def list_instances():
+    """Return the names of the configured instances, the default one first."""
+    names = [DEFAULT_INSTANCE] if (BASE_DIR / "config.json").exists() else []
+    if INSTANCES_DIR.is_dir():
+        names += sorted(path.name for path in INSTANCES_DIR.iterdir() if (path / "config.json").exists())
+    return names
+
+
+BASE_DIR = get_base_dir()
+INSTANCES_DIR = BASE_DIR / "instances"
 CONFIG_DIR = get_config_dir()
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
+# (modification time, data) of the last configuration read
+_loaded = None
+
 
 def ensure_config_directory():
     """Ensure the configuration directory exists."""
@@ -24,29 +52,64 @@ def ensure_config_directory():
         CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def write_file(path, content):
+    """Write bytes to a file atomically, so concurrent processes never read a partial file.
+
+    The content goes to a private temporary file next to `path`, which then
+    replaces it in one step.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(descriptor, 'wb') as temporary_file:
+            temporary_file.write(content)
+        os.replace(temporary, path)
+    except BaseException:
+        if temporary.exists():
+            temporary.unlink()
+        raise
+
+
+def write_json(path, data, indent=4):
+    """Write JSON to a file atomically (see `write_file`)."""
+    write_file(path, json.dumps(data, indent=indent).encode())
+
+
 def save_config(data):
     """Save the configuration data to a file."""
-    with CONFIG_FILE.open('w') as config_file:
-        json.dump(data, config_file, indent=4)
+    global _loaded
+    write_json(CONFIG_FILE, data)
+    _loaded = None
 
 
 def load_config():
-    """Load the configuration data from the file."""
-    if CONFIG_FILE.exists():
+    """Load the configuration data from the file.
+
+    The parsed file is reused while it is unchanged on disk, so commands run
+    in one process (e.g. `taiga batch`) do not parse it again.
+    """
+    global _loaded
+    try:
+        modified = CONFIG_FILE.stat().st_mtime_ns
+    except OSError:
+        return {}
+    if _loaded is None or _loaded[0] != modified:
         with CONFIG_FILE.open('r') as config_file:
-            return json.load(config_file)
-    return {}
+            _loaded = (modified, json.load(config_file))
+    return _loaded[1]
 
 
 def validate_credentials(api_url, username, password):
     """Validate the user credentials with Taiga server."""
-    api = TaigaAPI(host=api_url)
+    from taiga_cli import transport
+
     try:
-        api.auth(username=username, password=password)
+        transport.authenticate(api_url, username, password)
         print("Authentication successful!")
         return True
     except Exception as e:
-        print(f"Authentication failed: {e}")
+        output.error(f"Authentication failed: {e}")
         return False
 
 
@@ -62,7 +125,7 @@ def run(args):
 
     print("\nValidating credentials...")
     if not validate_credentials(api_url, username, password):
-        print("Invalid credentials. Please try again.")
+        output.error("Invalid credentials. Please try again.")
         return
 
     # Save the configuration without the password
@@ -72,4 +135,8 @@ def run(args):
     }
     save_config(config_data)
 
-    print("Configuration saved successfully!")
+    instance = os.environ.get(INSTANCE_VARIABLE)
+    if instance and instance != DEFAULT_INSTANCE:
+        print(f"Configuration of instance '{instance}' saved successfully!")
+    else:
+        print("Configuration saved successfully!")
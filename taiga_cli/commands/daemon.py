@@ -0,0 +1,172 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from taiga_cli.commands.config import CONFIG_DIR, load_config, write_json
+from taiga_cli.cliparser import parser
+from taiga_cli import output, transport
+
+
+DAEMON_FILE = CONFIG_DIR / "daemon.json"
+
+# Seconds without requests after which the daemon exits, overridable with "daemon_idle_timeout"
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+
+# Headers that describe a single connection and must not be forwarded
+HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length", "content-encoding",
+}
+
+
+def load_daemon_info():
+    """Return the pid/port record of a live daemon, or None."""
+    if not DAEMON_FILE.exists():
+        return None
+    try:
+        with DAEMON_FILE.open('r') as daemon_file:
+            info = json.load(daemon_file)
+        os.kill(info["pid"], 0)
+    except (ValueError, KeyError, OSError):
+        return None
+    return info
+
+
+def running_daemon_url(api_url):
+    """Return the local URL of a daemon forwarding to `api_url`, or None if there is none."""
+    info = load_daemon_info()
+    if not info or info.get("api_url") != api_url:
+        return None
+    return f"http://127.0.0.1:{info['port']}"
+
+
+def serve():
+    """Forward local requests to the configured server over pooled keep-alive connections."""
+    config = load_config()
+    transport.configure(config)
+    target = config["api_url"].rstrip("/")
+    idle_timeout = config.get("daemon_idle_timeout", DEFAULT_IDLE_TIMEOUT)
+    last_request = [time.monotonic()]
+
+    class ForwardingHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def forward(self):
+            last_request[0] = time.monotonic()
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length) if length else None
+            headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_HEADERS}
+            try:
+                response = transport.send(self.command, target + self.path, headers=headers, data=body, allow_redirects=False)
+            except requests.RequestException as e:
+                self.send_error(502, str(e))
+                return
+
+            content = response.content
+            self.send_response(response.status_code)
+            for key, value in response.headers.items():
+                if key.lower() not in HOP_HEADERS:
+                    self.send_header(key, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = forward
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ForwardingHandler)
+    server.daemon_threads = True
+
+    def shutdown_when_idle():
+        while time.monotonic() - last_request[0] < idle_timeout:
+            time.sleep(5)
+        server.shutdown()
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    threading.Thread(target=shutdown_when_idle, daemon=True).start()
+
+    write_json(DAEMON_FILE, {"pid": os.getpid(), "port": server.server_address[1], "api_url": config["api_url"]})
+    try:
+        server.serve_forever()
+    finally:
+        if DAEMON_FILE.exists():
+            DAEMON_FILE.unlink()
+
+
+def start_daemon():
+    """Start the connection daemon in the background."""
+    config = load_config()
+    if not config:
+        output.error("Configuration not found. Please run `taiga config` first.")
+        return
+
+    if running_daemon_url(config["api_url"]):
+        print("Connection daemon is already running.")
+        return
+
+    subprocess.Popen(
+        [sys.executable, "-m", "taiga_cli.commands.daemon"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    for _ in range(50):
+        url = running_daemon_url(config["api_url"])
+        if url:
+            print(f"Connection daemon started on {url}.")
+            return
+        time.sleep(0.1)
+    print("Connection daemon did not start.")
+
+
+def stop_daemon():
+    """Stop the connection daemon."""
+    info = load_daemon_info()
+    if not info:
+        print("Connection daemon is not running.")
+        return
+
+    os.kill(info["pid"], signal.SIGTERM)
+    print("Connection daemon stopped.")
+
+
+def daemon_status():
+    """Show whether the connection daemon is running."""
+    info = load_daemon_info()
+    if info:
+        print(f"Connection daemon running (pid {info['pid']}, port {info['port']}) for {info['api_url']}.")
+    else:
+        print("Connection daemon is not running.")
+
+
+def run(args):
+    """Handle the `taiga daemon` command."""
+    if len(args) < 1:
+        parser.print_help()
+        return
+
+    command = args[0]
+
+    if command == "start":
+        start_daemon()
+    elif command == "stop":
+        stop_daemon()
+    elif command == "status":
+        daemon_status()
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    serve()
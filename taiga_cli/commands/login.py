@@ -1,23 +1,35 @@
 import os
+import sys
 import json
+import time
+import base64
+import threading
 from getpass import getpass
-from taiga import TaigaAPI
-from pathlib import Path
 import datetime
-from taiga_cli.commands.config import load_config, ensure_config_directory
+from taiga_cli.commands.config import CONFIG_DIR, load_config, write_json
 from taiga_cli.cliparser import parser
+from taiga_cli import output
 
 
-# Define paths for the token file
-CONFIG_DIR = Path.home() / ".config" / "taiga-cli"
 TOKEN_FILE = CONFIG_DIR / "token.json"
+TOKEN_LOCK = CONFIG_DIR / "token.lock"
+
+# Lifetime assumed for tokens that do not state their own expiry
+DEFAULT_TOKEN_LIFETIME = datetime.timedelta(hours=2)
+
+# Renew the token once less than this fraction of its lifetime remains
+REFRESH_THRESHOLD = 0.1
+
+# Seconds after which a renewal lock left behind by a crashed process is ignored
+LOCK_TIMEOUT = 30
+
+# API client shared by every command run in this process
+_api = None
 
 
 def save_token(token_data):
     """Save the token data to a file."""
-    ensure_config_directory()
-    with TOKEN_FILE.open('w') as token_file:
-        json.dump(token_data, token_file, indent=4)
+    write_json(TOKEN_FILE, token_data)
 
 
 def load_token():
@@ -28,6 +40,27 @@ def load_token():
     return {}
 
 
+def token_expiration(token, issued):
+    """Return when a token expires, from its JWT `exp` claim or the default lifetime."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return datetime.datetime.fromtimestamp(claims["exp"])
+    except (IndexError, ValueError, KeyError, TypeError):
+        return issued + DEFAULT_TOKEN_LIFETIME
+
+
+def new_token_data(token, refresh=None):
+    """Build the token record saved to `token.json` for a token that was just issued."""
+    issued = datetime.datetime.now()
+    return {
+        "token": token,
+        "refresh": refresh,
+        "issued": issued.isoformat(),
+        "expiration": token_expiration(token, issued).isoformat(),
+    }
+
+
 def is_token_valid(token_data):
     """Check if the stored token is still valid."""
     if not token_data:
@@ -41,55 +74,145 @@ def is_token_valid(token_data):
     return datetime.datetime.now() < expiration_time
 
 
+def needs_refresh(token_data):
+    """Check if the stored token is close enough to its expiry to be renewed."""
+    if not token_data.get("refresh") or not token_data.get("issued"):
+        return False
+
+    issued = datetime.datetime.fromisoformat(token_data["issued"])
+    expiration = datetime.datetime.fromisoformat(token_data["expiration"])
+    return expiration - datetime.datetime.now() < (expiration - issued) * REFRESH_THRESHOLD
+
+
+def acquire_token_lock():
+    """Take the renewal lock shared by every CLI process, returning whether it was taken."""
+    try:
+        os.close(os.open(TOKEN_LOCK, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+        return True
+    except FileExistsError:
+        try:
+            if time.time() - TOKEN_LOCK.stat().st_mtime > LOCK_TIMEOUT:
+                TOKEN_LOCK.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def refresh_token(api_url, wait=False):
+    """Renew the stored token with its refresh token and return the new token data, or None.
+
+    Only one process renews at a time. The others give up, or with `wait`
+    wait for it to finish and use the token it saved.
+    """
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not acquire_token_lock():
+        if not wait or time.monotonic() > deadline:
+            return None
+        time.sleep(0.2)
+
+    try:
+        token_data = load_token()
+        if is_token_valid(token_data) and not needs_refresh(token_data):
+            # Another process renewed it while we waited
+            return token_data
+        if not token_data.get("refresh"):
+            return None
+
+        from taiga_cli import transport
+
+        data = transport.refresh_auth(api_url, token_data["refresh"])
+        token_data = new_token_data(data["auth_token"], data.get("refresh", token_data["refresh"]))
+        save_token(token_data)
+        return token_data
+    except Exception:
+        return None
+    finally:
+        TOKEN_LOCK.unlink(missing_ok=True)
+
+
+def renew_in_background(api, api_url):
+    """Renew the token while the command runs, switching the client to it once issued."""
+    def renew():
+        token_data = refresh_token(api_url)
+        if token_data:
+            api.token = api.raw_request.token = token_data["token"]
+
+    # Not a daemon thread, so the process waits for the new token to be saved
+    threading.Thread(target=renew, name="token-refresh").start()
+
+
+def renew_if_needed(api):
+    """Keep the token of a long-running command current: adopt one renewed elsewhere, or renew it."""
+    token_data = load_token()
+    if token_data.get("token") != api.token and is_token_valid(token_data):
+        api.token = api.raw_request.token = token_data["token"]
+    elif needs_refresh(token_data):
+        renew_in_background(api, load_config()["api_url"])
+
+
 def login_and_save_token(api_url, username, password):
     """Perform login and save the token."""
-    api = TaigaAPI(host=api_url)
-    try:
-        api.auth(username=username, password=password)
-        token = api.token
-        expiration = (datetime.datetime.now() + datetime.timedelta(hours=2)).isoformat()
+    from taiga_cli import transport
 
-        save_token({
-            "token": token,
-            "expiration": expiration
-        })
+    try:
+        api = transport.authenticate(api_url, username, password)
+        token_data = new_token_data(api.token, api.token_refresh)
+        save_token(token_data)
 
-        print(f"Login successful! Token valid until {expiration}")
+        print(f"Login successful! Token valid until {token_data['expiration']}")
         return True
     except Exception as e:
-        print(f"Login failed: {e}")
+        output.error(f"Login failed: {e}")
         return False
 
 
 def get_api_instance():
-    """Get a TaigaAPI instance with the stored token if valid."""
+    """Get the shared TaigaAPI instance, using the stored token if valid."""
+    global _api
+    if _api is not None:
+        return _api
+
     config = load_config()
     if not config:
-        print("Configuration not found. Please run `taiga config`.")
+        output.error("Configuration not found. Please run `taiga config`.")
         return None
 
+    # The HTTP stack is only loaded by commands that talk to the server
+    from taiga_cli import transport
+    from taiga_cli.commands.daemon import running_daemon_url
+
+    transport.configure(config)
+    daemon_url = running_daemon_url(config["api_url"])
     token_data = load_token()
     if is_token_valid(token_data):
-        return TaigaAPI(token=token_data["token"], host=config["api_url"])
+        _api = transport.create_api(config["api_url"], token_data["token"], daemon_url)
+        if needs_refresh(token_data):
+            renew_in_background(_api, config["api_url"])
+        return _api
+
+    token_data = refresh_token(config["api_url"], wait=True) if token_data.get("refresh") else None
+    if token_data:
+        _api = transport.create_api(config["api_url"], token_data["token"], daemon_url)
+        return _api
+    elif not sys.stdin.isatty():
+        output.error("Token is invalid or expired and could not be renewed. Please run `taiga login`.")
+        return None
     else:
-        print("Token is invalid or expired. Attempting re-login...")
+        output.error("Token is invalid or expired. Attempting re-login...")
         username = config.get("username")
         api_url = config.get("api_url")
         password = getpass("Enter your Taiga password: ")
 
         if login_and_save_token(api_url, username, password):
-            return TaigaAPI(token=load_token()["token"], host=config["api_url"])
+            _api = transport.create_api(config["api_url"], load_token()["token"], daemon_url)
+            return _api
         else:
-            print("Re-login failed. Please run `taiga login` manually.")
+            output.error("Re-login failed. Please run `taiga login` manually.")
             return None
 
 
-def get_api_and_defaults(project_slug=None, sprint_slug=None, all_sprints=False):
-    """Retrieve API instance and defaults for project and sprint."""
-    api = get_api_instance()
-    if not api:
-        raise RuntimeError("Unable to authenticate. Please log in using `taiga login`.")
-
+def get_defaults(project_slug=None, sprint_slug=None, all_sprints=False):
+    """Fill in the project and sprint slugs from the configured defaults."""
     config = load_config()
 
     if not project_slug:
@@ -102,6 +225,16 @@ def get_api_and_defaults(project_slug=None, sprint_slug=None, all_sprints=False)
         if not sprint_slug:
             raise ValueError("No default sprint set. Use `taiga sprint set-default <slug>`.")
 
+    return project_slug, sprint_slug
+
+
+def get_api_and_defaults(project_slug=None, sprint_slug=None, all_sprints=False):
+    """Retrieve API instance and defaults for project and sprint."""
+    api = get_api_instance()
+    if not api:
+        raise RuntimeError("Unable to authenticate. Please log in using `taiga login`.")
+
+    project_slug, sprint_slug = get_defaults(project_slug, sprint_slug, all_sprints)
     return api, project_slug, sprint_slug
 
 
@@ -125,7 +258,7 @@ def run(args):
     """Handle the `taiga login` command."""
     config = load_config()
     if not config:
-        print("Configuration not found. Please run `taiga config` first.")
+        output.error("Configuration not found. Please run `taiga config` first.")
         return
 
     print("--- Login to Taiga CLI ---")
@@ -137,4 +270,4 @@ def run(args):
     if login_and_save_token(api_url, username, password):
         print("You are now logged in.")
     else:
-        print("Login failed. Please check your credentials and try again.")
+        output.error("Login failed. Please check your credentials and try again.")
@@ -1,53 +1,66 @@
 from taiga_cli.cliparser import parser
 from taiga_cli.commands.config import load_config, save_config
 from taiga_cli.commands.login import get_api_instance
+from taiga_cli.commands.cache import Ref, resolve_project, save_cache, store
+from taiga_cli import output
 
 
 def set_default_project(project_slug):
     """Set a default project by its slug."""
     config = load_config()
     if not config:
-        print("Configuration not found. Please run `taiga config` first.")
+        output.error("Configuration not found. Please run `taiga config` first.")
         return
 
     api = get_api_instance()
     if not api:
-        print("Unable to authenticate. Please log in using `taiga login`.")
+        output.error("Unable to authenticate. Please log in using `taiga login`.")
         return
 
     try:
-        projects = api.projects.list()
-        project = next((p for p in projects if p.slug == project_slug), None)
+        project = resolve_project(api, project_slug)
         if not project:
-            print(f"Project with slug '{project_slug}' not found.")
+            output.error(f"Project with slug '{project_slug}' not found.")
             return
 
         config["default_project"] = project_slug
         save_config(config)
         print(f"Default project set to '{project.name}' (slug: {project_slug}).")
     except Exception as e:
-        print(f"Error setting default project: {e}")
+        output.error(f"Error setting default project: {e}")
+
+
+def fetch_projects(api, user_only=True):
+    """Fetch the projects the user is a member of, or all projects."""
+    params = {
+        "order_by": "user_order",
+        "slight": True
+    }
+
+    if user_only:
+        params["member"] = api.me().id
+
+    projects = api.projects.list(**params)
+    for project in projects:
+        store("projects", project.slug, Ref(project.id, project.slug, project.name))
+    save_cache()
+    return projects
 
 
 def list_projects(user_only=True):
     """List projects available to the user or all projects based on the flag."""
     api = get_api_instance()
     if not api:
-        print("Unable to authenticate. Please log in using `taiga login`.")
+        output.error("Unable to authenticate. Please log in using `taiga login`.")
         return
 
     try:
-        params = {
-            "order_by": "user_order",
-            "slight": True
-        }
-
-        if user_only:
-            params["member"] = api.me().id
-
-        projects = api.projects.list(**params)
+        projects = fetch_projects(api, user_only)
 
-        if projects:
+        if output.structured():
+            output.write_records(({"id": project.id, "slug": project.slug, "name": project.name} for project in projects),
+                                 ("id", "slug", "name"))
+        elif projects:
             scope = "your" if user_only else "all"
             print(f"Projects ({scope} projects):")
             for project in projects:
@@ -55,19 +68,19 @@ def list_projects(user_only=True):
         else:
             print("No projects found.")
     except Exception as e:
-        print(f"Error fetching projects: {e}")
+        output.error(f"Error fetching projects: {e}")
 
 
 def list_default_project():
     """List the default configured project."""
     config = load_config()
     if not config:
-        print("Configuration not found. Please run `taiga config` first.")
+        output.error("Configuration not found. Please run `taiga config` first.")
         return
 
     default_project = config.get("default_project")
     if not default_project:
-        print("No default project is set. Use `taiga project set-default <slug>` to configure one.")
+        output.error("No default project is set. Use `taiga project set-default <slug>` to configure one.")
         return
 
     print(f"Default project: {default_project}")
@@ -1,34 +1,47 @@
-from taiga_cli.commands.login import get_api_instance, get_api_and_project, get_api_and_defaults
+import datetime
+import shutil
+import sys
+import time
+from taiga_cli.commands.login import get_api_and_project, get_api_and_defaults, get_defaults, renew_if_needed
 from taiga_cli.commands.project import load_config, save_config
+from taiga_cli.commands.cache import resolve_assignee, resolve_project, resolve_sprint
 from taiga_cli.cliparser import parser
+from taiga_cli import history, mirror, output, profiling, query
+from taiga_cli.aggregate import aggregate, progress, stats_counters, user_key
+from taiga_cli.concurrency import map_as_completed, run_parallel
+
+
+# Seconds between full reloads of a watched listing, which drop the deleted stories the polls cannot see
+RELOAD_INTERVAL = 10 * 60
 
 
 def get_project_and_sprint(api, project_slug, sprint_slug=None):
-    """Retrieve the project and optional sprint objects based on slugs."""
-    projects = api.projects.list()
-    project = next((p for p in projects if p.slug == project_slug), None)
-    if not project:
-        raise ValueError(f"Project with slug '{project_slug}' not found.")
+    """Retrieve the project and optional sprint references based on slugs."""
+    with profiling.phase("resolve"):
+        project = resolve_project(api, project_slug)
+        if not project:
+            raise ValueError(f"Project with slug '{project_slug}' not found.")
 
-    if sprint_slug:
-        sprints = api.milestones.list(project=project.id)
-        sprint = next((s for s in sprints if s.slug == sprint_slug), None)
-        if not sprint:
-            raise ValueError(f"Sprint with slug '{sprint_slug}' not found in project '{project.name}'.")
-        return project, sprint
+        if sprint_slug:
+            sprint = resolve_sprint(api, project, sprint_slug)
+            if not sprint:
+                raise ValueError(f"Sprint with slug '{sprint_slug}' not found in project '{project.name}'.")
+            return project, sprint
 
-    return project, None
+        return project, None
 
 
 def list_sprints(project_slug=None):
     """List sprints (milestones) for a given project slug or the default project."""
-    api, project_slug = get_api_and_project(project_slug)
-
     try:
+        api, project_slug = get_api_and_project(project_slug)
         project, _ = get_project_and_sprint(api, project_slug)
-        sprints = api.milestones.list(project=project.id)
+        sprints = query.list_milestones(api, project.id)
 
-        if sprints:
+        if output.structured():
+            output.write_records(({"id": sprint.id, "slug": sprint.slug, "name": sprint.name, "closed": bool(sprint.closed)}
+                                  for sprint in sprints), ("id", "slug", "name", "closed"))
+        elif sprints:
             print(f"Sprints for project '{project.name}':")
             for sprint in sprints:
                 status_text = "Open" if not sprint.closed else "Closed"
@@ -36,113 +49,306 @@ def list_sprints(project_slug=None):
         else:
             print(f"No sprints found for project '{project.name}'.")
     except Exception as e:
-        print(f"Error fetching sprints: {e}")
+        output.error(f"Error fetching sprints: {e}")
+
+
+def mirrored_user_stats(project, sprint_slug, user=None, all_users=False):
+    """Compute sprint user statistics from the local mirror."""
+    sprint = mirror.get_sprint(project, sprint_slug)
+    if not sprint:
+        raise ValueError(f"Sprint with slug '{sprint_slug}' not found in project '{project.name}'.")
+
+    assigned_to = None if all_users else mirror.resolve_assignee(project, user)
+    stats = aggregate(mirror.iter_stories(project.id, milestone_id=sprint.id, assigned_to=assigned_to), user=user_key)
+    total_stories = mirror.count_stories(project.id, milestone_id=sprint.id)
+    closed_stories = mirror.count_stories(project.id, milestone_id=sprint.id, status="closed")
+    totals = {"stories": total_stories, "closed_stories": closed_stories, "open_stories": total_stories - closed_stories}
+    return sprint, stats, totals
+
+
+def fetch_user_stats(project_slug, sprint_slug, user=None, all_users=False):
+    """Compute sprint user statistics from the server."""
+    api, project_slug, sprint_slug = get_api_and_defaults(project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=False)
+    (project, sprint), assigned_to = run_parallel(
+        lambda: get_project_and_sprint(api, project_slug, sprint_slug),
+        lambda: None if all_users else resolve_assignee(api, user),
+    )
+
+    if all_users:
+        stats = aggregate(query.iter_stories(api, project.id, milestone_id=sprint.id), user=user_key)
+        return sprint, stats, stats["total"]
 
+    # The sprint totals come from the server's stats; only the user's own stories are downloaded
+    stats, sprint_stats = run_parallel(
+        lambda: aggregate(query.iter_stories(api, project.id, milestone_id=sprint.id, assigned_to=assigned_to), user=user_key),
+        lambda: query.milestone_stats(api, sprint.id),
+    )
+    return sprint, stats, stats_counters(sprint_stats)
 
-def sprint_user_stats(sprint_slug=None, project_slug=None, user=None, all_users=False):
+
+def sprint_user_stats(sprint_slug=None, project_slug=None, user=None, all_users=False, offline=False, max_age=None):
     """List user statistics for a specific sprint or project, optionally filtered by user."""
     try:
-        api, project_slug, sprint_slug = get_api_and_defaults(project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=False)
-        project, sprint = get_project_and_sprint(api, project_slug, sprint_slug)
+        project_slug, sprint_slug = get_defaults(project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=False)
+        project = mirror.fresh_project(project_slug, offline, max_age)
+        if project:
+            sprint, stats, totals = mirrored_user_stats(project, sprint_slug, user, all_users)
+        else:
+            sprint, stats, totals = fetch_user_stats(project_slug, sprint_slug, user, all_users)
 
-        stories = sprint.user_stories if sprint else []
-        user_stats = {}
-        total_stories = len(stories)
-        open_stories = sum(1 for story in stories if not story.is_closed)
-        closed_stories = total_stories - open_stories
-        progress_percentage = (closed_stories / total_stories * 100) if total_stories > 0 else 0
-        if user is None:
-            user = api.me().username
-
-        for story in stories:
-            assigned_to = story.assigned_to_extra_info.get("username") if story.assigned_to_extra_info else "Unassigned"
-            if not all_users and assigned_to != user:
-                continue
-
-            points = story.total_points or 0
-
-            if assigned_to not in user_stats:
-                user_stats[assigned_to] = {
-                    "stories": 0,
-                    "points": 0,
-                    "full_name": story.assigned_to_extra_info.get("full_name_display") if story.assigned_to_extra_info else "Unassigned",
-                    "open_stories": 0,
-                    "closed_stories": 0,
-                }
-
-            user_stats[assigned_to]["stories"] += 1
-            user_stats[assigned_to]["points"] += points
-            if story.is_closed:
-                user_stats[assigned_to]["closed_stories"] += 1
-            else:
-                user_stats[assigned_to]["open_stories"] += 1
-
-        print(f"User statistics for sprint '{sprint.name if sprint else 'Backlog'}':")
-        print(f"Total stories: {total_stories}, Open: {open_stories}, Closed: {closed_stories}, Progress: {progress_percentage:.2f}%")
-        for user, stats in user_stats.items():
-            user_progress = (stats["closed_stories"] / stats["stories"] * 100) if stats["stories"] > 0 else 0
-            print(f"- {user}: {stats['stories']} stories (Open: {stats['open_stories']}, Closed: {stats['closed_stories']}), {stats['points']} points, Progress: {user_progress:.2f}%")
+        if output.structured():
+            sprint_name = sprint.name if sprint else "Backlog"
+            output.write_records((output.counter_record(counters, sprint=sprint_name, user=user)
+                                  for user, counters in stats["user"].items()),
+                                 ("sprint", "user", *output.COUNTER_FIELDS))
+            return
+
+        with profiling.phase("render"):
+            print(f"User statistics for sprint '{sprint.name if sprint else 'Backlog'}':")
+            print(f"Total stories: {totals['stories']}, Open: {totals['open_stories']}, Closed: {totals['closed_stories']}, Progress: {progress(totals):.2f}%")
+            for user, counters in stats["user"].items():
+                print(f"- {user}: {counters['stories']} stories (Open: {counters['open_stories']}, Closed: {counters['closed_stories']}), {counters['points']} points, Progress: {progress(counters):.2f}%")
     except Exception as e:
-        print(f"Error fetching user statistics: {e}")
+        output.error(f"Error fetching user statistics: {e}")
 
 
-def list_user_stories(project_slug=None, sprint_slug=None, user=None, all_users=False):
+def list_user_stories(project_slug=None, sprint_slug=None, user=None, all_users=False, status=None):
     """List user stories for a specific sprint or project."""
+    try:
+        api, project_slug, sprint_slug = get_api_and_defaults(project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=False)
+        (project, sprint), assigned_to = run_parallel(
+            lambda: get_project_and_sprint(api, project_slug, sprint_slug),
+            lambda: None if all_users else resolve_assignee(api, user),
+        )
+        stories = query.iter_stories(api, project.id, milestone_id=sprint.id, assigned_to=assigned_to, status=status)
+        if output.structured():
+            output.write_records((output.story_record(story, project) for story in stories), output.STORY_FIELDS)
+            return
+
+        with profiling.phase("render"):
+            print(f"User stories for sprint '{sprint.name if sprint else 'Backlog'}':")
+
+            for story in stories:
+                print(story_line(story))
+    except Exception as e:
+        output.error(f"Error fetching user stories: {e}")
+
+
+def story_line(story):
+    """Return the line of a story in the sprint user stories listing."""
+    assigned_to = story.assigned_username or "Unassigned"
+    status = "Closed" if story.is_closed else "Open"
+    return f"- {story.subject} (Assigned to: {assigned_to}, Status: {status}, Points: {story.total_points or 0})"
+
+
+def story_matches(story, sprint, assigned_to=None, status=None):
+    """Return whether a story belongs in a sprint listing with the given filters."""
+    if story.milestone != sprint.id:
+        return False
+    if assigned_to is not None and story.assigned_to != (None if assigned_to == "null" else assigned_to):
+        return False
+    if status is not None and story.is_closed != (status == "closed"):
+        return False
+    return True
+
+
+def poll_stories(api, project, sprint, stories, watermark, assigned_to=None, status=None, reload=False):
+    """Apply the stories modified after `watermark` to a listing (id -> story) and return the new watermark.
+
+    The whole project is polled, so stories moved out of the sprint or
+    reassigned are noticed too. Deleted stories are never reported as
+    modified, so the listing is reloaded once the server counts a different
+    number of matching stories than it holds. A deletion offset by a story
+    the polls missed keeps the count equal, so `reload` replaces the listing anyway.
+    """
+    for story in query.iter_story_records(api, project=project.id, modified_date__gt=watermark):
+        # The server's own dates, so client clock skew does not matter
+        watermark = max(watermark, story.modified_date)
+        if story_matches(story, sprint, assigned_to, status):
+            stories[story.id] = story
+        else:
+            stories.pop(story.id, None)
+
+    if reload or query.count_stories(api, project.id, milestone_id=sprint.id, assigned_to=assigned_to, status=status) != len(stories):
+        stories.clear()
+        stories.update((story.id, story) for story in
+                       query.iter_stories(api, project.id, milestone_id=sprint.id, assigned_to=assigned_to, status=status))
+    return watermark
+
+
+def redraw(shown, lines):
+    """Rewrite on the terminal the lines of a listing that differ from the ones shown.
+
+    The cursor is expected right below the shown lines and is left below the new ones.
+    """
+    width = shutil.get_terminal_size().columns
+    # Wrapped lines would throw off the cursor movements
+    lines = [line[:width - 1] for line in lines]
+    updates = []
+    for row, line in enumerate(lines[:len(shown)]):
+        if line != shown[row]:
+            up = len(shown) - row
+            updates.append(f"\x1b[{up}A\r{line}\x1b[K\x1b[{up}B\r")
+    if len(lines) < len(shown):
+        updates.append(f"\x1b[{len(shown) - len(lines)}A\r\x1b[J")
+    updates.extend(line + "\n" for line in lines[len(shown):])
+    sys.stdout.write("".join(updates))
+    sys.stdout.flush()
+    return lines
+
+
+def watch_user_stories(project_slug=None, sprint_slug=None, user=None, all_users=False, status=None, interval=30):
+    """Keep the user stories of a sprint on screen, asking only for the stories modified since the last poll."""
+    if output.structured():
+        output.error("Error: --watch only supports the text format.")
+        return
+
+    try:
+        api, project_slug, sprint_slug = get_api_and_defaults(project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=False)
+        (project, sprint), assigned_to = run_parallel(
+            lambda: get_project_and_sprint(api, project_slug, sprint_slug),
+            lambda: None if all_users else resolve_assignee(api, user),
+        )
+        stories = {story.id: story for story in
+                   query.iter_stories(api, project.id, milestone_id=sprint.id, assigned_to=assigned_to, status=status)}
+    except Exception as e:
+        output.error(f"Error fetching user stories: {e}")
+        return
+
+    watermark = (max((story.modified_date for story in stories.values()), default=None)
+                 or datetime.datetime.now(datetime.timezone.utc).isoformat())
+    footer = f"Updated at {time.strftime('%H:%M:%S')}, every {interval}s. Press Ctrl+C to stop."
+    reloaded_at = time.monotonic()
+    shown = []
+    try:
+        while True:
+            lines = [f"User stories for sprint '{sprint.name}':", *map(story_line, stories.values()), footer]
+            if sys.stdout.isatty():
+                shown = redraw(shown, lines)
+            elif lines[1:-1] != shown[1:-1]:
+                # Without a terminal to redraw, print the whole listing whenever it changes
+                print("\n".join(lines), flush=True)
+                shown = lines
+            time.sleep(interval)
+            try:
+                renew_if_needed(api)
+                reload = time.monotonic() - reloaded_at >= RELOAD_INTERVAL
+                watermark = poll_stories(api, project, sprint, stories, watermark, assigned_to, status, reload)
+                if reload:
+                    reloaded_at = time.monotonic()
+                footer = f"Updated at {time.strftime('%H:%M:%S')}, every {interval}s. Press Ctrl+C to stop."
+            except Exception as e:
+                footer = f"Update failed at {time.strftime('%H:%M:%S')}: {e}"
+    except KeyboardInterrupt:
+        pass
+
+
+def sprint_dates(sprint):
+    """Return the estimated start and finish days of a milestone (a model, or its JSON or stats)."""
+    get = sprint.get if isinstance(sprint, dict) else lambda name: getattr(sprint, name, None)
+    start, finish = history.to_day(get("estimated_start")), history.to_day(get("estimated_finish"))
+    if not (start and finish):
+        raise ValueError(f"Sprint '{get('name')}' has no estimated start and finish dates.")
+    return start, finish
+
+
+def sprint_burndown(sprint_slug=None, project_slug=None):
+    """Show the points left at the end of every day of a sprint."""
     try:
         api, project_slug, sprint_slug = get_api_and_defaults(project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=False)
         project, sprint = get_project_and_sprint(api, project_slug, sprint_slug)
+        # The stats carry the sprint dates without the stories `milestones/<id>` embeds
+        stats, stories = run_parallel(
+            lambda: query.milestone_stats(api, sprint.id),
+            lambda: query.list_stories(api, project.id, milestone_id=sprint.id),
+        )
+        start, finish = sprint_dates(stats)
+        days, total = history.burndown(stories, start, finish, today=datetime.date.today())
+
+        if output.structured():
+            output.write_records(({"sprint": sprint.name, **day} for day in days),
+                                 ("sprint", "day", "completed", "remaining", "ideal"))
+            return
 
-        stories = sprint.user_stories if sprint else []
-        print(f"User stories for sprint '{sprint.name if sprint else 'Backlog'}':")
+        with profiling.phase("render"):
+            print(f"Burndown for sprint '{sprint.name}' ({start} to {finish}), {total} points:")
+            for day in days:
+                remaining = f"{day['remaining']} points remaining" if day["remaining"] is not None else "not started"
+                print(f"- {day['day']}: {remaining} (ideal: {day['ideal']})")
+    except Exception as e:
+        output.error(f"Error computing the sprint burndown: {e}")
 
-        if user is None:
-            user = api.me().username
 
-        for story in stories:
-            assigned_to = story.assigned_to_extra_info.get("username") if story.assigned_to_extra_info else "Unassigned"
-            if not all_users and assigned_to != user:
-                continue
+def sprint_velocity(project_slug=None, last=5):
+    """Show the points committed and completed in the last sprints of a project."""
+    try:
+        api, project_slug = get_api_and_project(project_slug)
+        project, _ = get_project_and_sprint(api, project_slug)
+        sprints = [sprint for sprint in query.list_milestones(api, project.id)
+                   if sprint.estimated_start and sprint.estimated_finish]
+        sprints = sorted(sprints, key=lambda sprint: sprint.estimated_start)[-last:]
+
+        # Every sprint's stories are streamed and reduced in a thread of its own
+        results = dict(map_as_completed(
+            lambda sprint: history.velocity(query.iter_stories(api, project.id, milestone_id=sprint.id), *sprint_dates(sprint)),
+            sprints,
+        ))
+        records = [{"sprint": sprint.name, "start": str(sprint.estimated_start), "finish": str(sprint.estimated_finish),
+                    "closed": bool(sprint.closed), "committed": results[sprint][0], "completed": results[sprint][1]}
+                   for sprint in sprints]
+
+        if output.structured():
+            output.write_records(records, ("sprint", "start", "finish", "closed", "committed", "completed"))
+            return
 
-            status = "Closed" if story.is_closed else "Open"
-            points = story.total_points or 0
-            print(f"- {story.subject} (Assigned to: {assigned_to}, Status: {status}, Points: {points})")
+        with profiling.phase("render"):
+            if not records:
+                print(f"No sprints with estimated dates found for project '{project.name}'.")
+                return
+            print(f"Velocity for project '{project.name}' (last {len(records)} sprints):")
+            for record in records:
+                status_text = "Closed" if record["closed"] else "Open"
+                print(f"- {record['sprint']} ({status_text}): {record['completed']} of {record['committed']} points completed")
+            # Sprints still running would drag the average down
+            finished = [record for record in records if record["closed"]] or records
+            average = sum(record["completed"] for record in finished) / len(finished)
+            print(f"Average velocity: {average:.2f} points per sprint")
     except Exception as e:
-        print(f"Error fetching user stories: {e}")
+        output.error(f"Error computing the project velocity: {e}")
 
 
 def set_default_sprint(sprint_slug):
     """Set a default sprint by its slug."""
     config = load_config()
     if not config:
-        print("Configuration not found. Please run `taiga config` first.")
+        output.error("Configuration not found. Please run `taiga config` first.")
         return
 
-    api = get_api_and_project(None)[0]
-
     try:
         project_slug = config.get("default_project")
         if not project_slug:
-            print("No default project is set. Use `taiga project set-default <slug>` first.")
+            output.error("No default project is set. Use `taiga project set-default <slug>` first.")
             return
 
+        api, _ = get_api_and_project(project_slug)
         _, sprint = get_project_and_sprint(api, project_slug, sprint_slug)
         config["default_sprint"] = sprint_slug
         save_config(config)
         print(f"Default sprint set to '{sprint.name}' (slug: {sprint.slug}).")
     except Exception as e:
-        print(f"Error setting default sprint: {e}")
+        output.error(f"Error setting default sprint: {e}")
 
 
 def list_default_sprint():
     """List the default configured sprint."""
     config = load_config()
     if not config:
-        print("Configuration not found. Please run `taiga config` first.")
+        output.error("Configuration not found. Please run `taiga config` first.")
         return
 
     default_sprint = config.get("default_sprint")
     if not default_sprint:
-        print("No default sprint is set. Use `taiga sprint set-default <slug>` to configure one.")
+        output.error("No default sprint is set. Use `taiga sprint set-default <slug>` to configure one.")
         return
 
     print(f"Default sprint: {default_sprint}")
@@ -158,17 +364,32 @@ def run(args):
     user = None
     project_slug = None
     sprint_slug = None
+    status = None
     all_users = False
+    offline = False
+    max_age = None
+    last = 5
+    watch = None
 
     for arg in args[1:]:
         if arg.startswith("--user="):
             user = arg.split("=", 1)[1]
+        elif arg.startswith("--status="):
+            status = arg.split("=", 1)[1]
         elif arg.startswith("--project="):
             project_slug = arg.split("=", 1)[1]
         elif arg.startswith("--sprint="):
             sprint_slug = arg.split("=", 1)[1]
         elif arg == "--all-users":
             all_users = True
+        elif arg == "--offline":
+            offline = True
+        elif arg.startswith("--max-age="):
+            max_age = int(arg.split("=", 1)[1])
+        elif arg.startswith("--last="):
+            last = int(arg.split("=", 1)[1])
+        elif arg.startswith("--watch="):
+            watch = float(arg.split("=", 1)[1])
 
     if command == "ls":
         list_sprints(project_slug=project_slug)
@@ -177,9 +398,15 @@ def run(args):
     elif command == "set-default" and len(args) >= 2:
         set_default_sprint(args[1])
     elif command == "user-stats":
-        sprint_user_stats(sprint_slug=sprint_slug, project_slug=project_slug, user=user, all_users=all_users)
+        sprint_user_stats(sprint_slug=sprint_slug, project_slug=project_slug, user=user, all_users=all_users, offline=offline, max_age=max_age)
+    elif command == "user-stories" and watch:
+        watch_user_stories(project_slug=project_slug, sprint_slug=sprint_slug, user=user, all_users=all_users, status=status, interval=watch)
     elif command == "user-stories":
-        list_user_stories(project_slug=project_slug, sprint_slug=sprint_slug, user=user, all_users=all_users)
+        list_user_stories(project_slug=project_slug, sprint_slug=sprint_slug, user=user, all_users=all_users, status=status)
+    elif command == "burndown":
+        sprint_burndown(sprint_slug=sprint_slug, project_slug=project_slug)
+    elif command == "velocity":
+        sprint_velocity(project_slug=project_slug, last=last)
     else:
         parser.print_help()
 
@@ -1,107 +1,522 @@
-from taiga_cli.commands.login import get_api_and_defaults
+import json
+import sys
+from itertools import chain
+from taiga_cli.commands.config import list_instances
+from taiga_cli.commands.login import get_api_instance, get_api_and_defaults, get_api_and_project, get_defaults
+from taiga_cli.commands.project import fetch_projects
+from taiga_cli.commands.cache import project_sprints, resolve_assignee, resolve_project, resolve_sprint, resolve_user
 from taiga_cli.cliparser import parser
+from taiga_cli import bulk, mirror, output, profiling, query
+from taiga_cli.aggregate import aggregate, progress, sprint_key, stats_counters, user_key
+from taiga_cli.concurrency import map_as_completed, run_parallel
+
+
+# Projects fetched at the same time by `--all-projects`
+PROJECT_WORKERS = 4
+
+# Columns of `stories stats` records
+STATS_FIELDS = ("project", "sprint", *output.COUNTER_FIELDS)
 
 
 def fetch_stories(api, project_slug, sprint_slug, all_sprints, all_users, user, status):
-    """Fetch user stories based on provided filters."""
-    projects = api.projects.list()
-    project = next((p for p in projects if p.slug == project_slug), None)
-    if not project:
-        raise ValueError(f"Project with slug '{project_slug}' not found.")
+    """Fetch user stories based on provided filters, streamed from the server."""
+    with profiling.phase("resolve"):
+        # The assignee lookup does not depend on the project, so it overlaps with it
+        project, assigned_to = run_parallel(
+            lambda: resolve_project(api, project_slug),
+            lambda: resolve_assignee(api, user) if user or not all_users else None,
+        )
+        if not project:
+            raise ValueError(f"Project with slug '{project_slug}' not found.")
 
-    query_params = {"project": project.id}
+        if all_sprints:
+            return iter_stories_by_sprint(api, project, assigned_to, status), project
 
-    if not all_sprints:
-        sprints = api.milestones.list(project=project.id)
-        sprint = next((s for s in sprints if s.slug == sprint_slug), None)
+        sprint = resolve_sprint(api, project, sprint_slug)
         if not sprint:
             raise ValueError(f"Sprint with slug '{sprint_slug}' not found in project '{project.name}'.")
-        query_params["milestone"] = sprint.id
 
-    if not all_users:
-        query_params["assigned_to"] = api.me().id
+    return query.iter_stories(api, project.id, milestone_id=sprint.id, assigned_to=assigned_to, status=status), project
+
+
+def mirrored_stories(project, sprint_slug, all_sprints, all_users, user, status):
+    """Read user stories matching the filters from the local mirror."""
+    assigned_to = mirror.resolve_assignee(project, user) if user or not all_users else None
+    if all_sprints:
+        return mirror.iter_stories(project.id, assigned_to=assigned_to, status=status)
+
+    sprint = mirror.get_sprint(project, sprint_slug)
+    if not sprint:
+        raise ValueError(f"Sprint with slug '{sprint_slug}' not found in project '{project.name}'.")
+    return mirror.iter_stories(project.id, milestone_id=sprint.id, assigned_to=assigned_to, status=status)
+
+
+def load_stories(project_slug, sprint_slug, all_sprints, all_users, user, status, offline=False, max_age=None):
+    """Return the stories matching the filters and their project, from the mirror when it may answer."""
+    project_slug, sprint_slug = get_defaults(project_slug, sprint_slug, all_sprints)
+    project = mirror.fresh_project(project_slug, offline, max_age)
+    if project:
+        return mirrored_stories(project, sprint_slug, all_sprints, all_users, user, status), project
+
+    api, project_slug, sprint_slug = get_api_and_defaults(project_slug, sprint_slug, all_sprints)
+    return fetch_stories(api, project_slug, sprint_slug, all_sprints, all_users, user, status)
+
+
+def iter_stories_by_sprint(api, project, assigned_to=None, status=None):
+    """Stream the stories of every sprint grouped by sprint, with the backlog last.
+
+    Results that fit in one page are fetched at once and grouped in memory.
+    Larger ones are streamed one sprint at a time; if the sprints known to the
+    cache hold fewer stories than the server counted, the sprints are indexed
+    again and the ones not seen yet are streamed too.
+    """
+    expected = query.count_stories(api, project.id, assigned_to=assigned_to, status=status)
+    if expected <= query.PAGE_SIZE:
+        yield from group_by_sprint(query.iter_stories(api, project.id, assigned_to=assigned_to, status=status))
+        return
+
+    seen = set()
+    received = 0
+    for refresh in (False, True):
+        for sprint in project_sprints(api, project, refresh=refresh):
+            if sprint.id in seen:
+                continue
+            seen.add(sprint.id)
+            for story in query.iter_stories(api, project.id, milestone_id=sprint.id, assigned_to=assigned_to, status=status):
+                received += 1
+                yield story
+        if not refresh:
+            for story in query.iter_stories(api, project.id, milestone_id=query.BACKLOG, assigned_to=assigned_to, status=status):
+                received += 1
+                yield story
+        if received >= expected:
+            return
+
+
+def group_by_sprint(stories):
+    """Yield stories grouped by sprint, in order of first appearance, with the backlog last."""
+    stories_by_sprint = {}
+    for story in stories:
+        stories_by_sprint.setdefault(story.milestone, []).append(story)
+    backlog = stories_by_sprint.pop(None, [])
+    for sprint_stories in stories_by_sprint.values():
+        yield from sprint_stories
+    yield from backlog
+
+
+def peek_stories(stories):
+    """Return an iterator over the stories, or None if there are none.
+
+    Only the first story is read ahead, so streamed results stay streamed.
+    """
+    stories = iter(stories)
+    first = next(stories, None)
+    if first is None:
+        return None
+    return chain([first], stories)
+
+
+def print_stories(project, stories):
+    """Print user stories as they arrive, with a sprint heading whenever the sprint changes."""
+    with profiling.phase("render"):
+        render_stories(project, stories)
+
+
+def render_stories(project, stories):
+    """Write the user stories listing."""
+    if output.structured():
+        output.write_records((output.story_record(story, project) for story in stories), output.STORY_FIELDS)
+        return
+
+    print(f"User Stories for Project '{project.name}':")
+    current_sprint = None
+    for story in stories:
+        sprint_name = story.milestone_name or "Backlog"
+        if sprint_name != current_sprint:
+            print(f"* Sprint '{sprint_name}':")
+            current_sprint = sprint_name
+        status = "Closed" if story.is_closed else "Open"
+        assigned_to = story.assigned_username or "Unassigned"
+        print(f"  * {story.subject} (Assigned to: {assigned_to}, Status: {status}, Points: {story.total_points or 0})")
+
+
+def stats_records(project, stories):
+    """Yield one record of per-sprint statistics for each sprint of the stories."""
+    return counter_records(project, aggregate(stories, sprint=sprint_key)["sprint"])
 
-    if user:
-        users = api.users.list(project=project.id)
-        user_details = next((u for u in users if u.username == user), None)
-        if user_details:
-            query_params["assigned_to"] = user_details.id
-        else:
-            raise ValueError(f"User '{user}' not found in project '{project.name}'.")
 
-    if status == "open":
-        query_params["is_closed"] = False
-    elif status == "closed":
-        query_params["is_closed"] = True
+def counter_records(project, sprint_counters):
+    """Yield one record for each sprint's counters."""
+    for sprint_name, counters in sprint_counters.items():
+        yield output.counter_record(counters, project=project.slug, sprint=sprint_name)
 
-    return api.user_stories.list(**query_params), project
 
+def print_stories_stats(project, stories, detailed=False):
+    """Print per-sprint statistics for user stories, aggregated in a single pass."""
+    with profiling.phase("render"):
+        render_stories_stats(project, stories, detailed)
 
-def list_assigned_stories(project_slug=None, sprint_slug=None, all_sprints=False, all_users=False, user=None, status=None):
+
+def render_stories_stats(project, stories, detailed=False):
+    """Write the per-sprint statistics listing."""
+    if output.structured():
+        # One record per sprint; `stories ls` gives the stories themselves
+        output.write_records(stats_records(project, stories), STATS_FIELDS)
+        return
+
+    if detailed:
+        # The detailed listing prints every story, so it has to keep them
+        stories = list(stories)
+    render_sprint_counters(project, aggregate(stories, sprint=sprint_key)["sprint"], stories if detailed else None)
+
+
+def render_sprint_counters(project, sprint_counters, stories=None):
+    """Write the per-sprint statistics listing from counters, with the stories of each sprint if given."""
+    print(f"User Story Statistics for Project '{project.name}':")
+    for sprint_name, counters in sprint_counters.items():
+        print(f"* Sprint '{sprint_name}':")
+        print(f"  - Total Points: {counters['points']}")
+        print(f"  - Open Points: {counters['open_points']}")
+        print(f"  - Closed Stories: {counters['closed_stories']}")
+        print(f"  - Open Stories: {counters['open_stories']}")
+        print(f"  - Progress: {progress(counters):.2f}%")
+
+        if stories is not None:
+            print("\nDetailed User Stories:")
+            for story in stories:
+                if sprint_key(story) != sprint_name:
+                    continue
+                status = "Closed" if story.is_closed else "Open"
+                print(f"  * {story.subject} (Assigned to: {user_key(story)}, Status: {status}, Points: {story.total_points or 0})")
+
+
+def fetch_sprint_counters(api, project_slug, sprint_slug, all_sprints):
+    """Return the counters of every sprint with stories, from the stats the server keeps per milestone.
+
+    The backlog has no milestone and so no stats; its stories are aggregated
+    here instead, and come last. With every sprint, the project's stories are
+    counted too: if the indexed sprints and the backlog hold fewer, the
+    sprints are indexed again and the new ones added. Sprints deleted since
+    they were indexed are left out.
+    """
+    with profiling.phase("resolve"):
+        project = resolve_project(api, project_slug)
+        if not project:
+            raise ValueError(f"Project with slug '{project_slug}' not found.")
+        if not all_sprints:
+            sprint = resolve_sprint(api, project, sprint_slug)
+            if not sprint:
+                raise ValueError(f"Sprint with slug '{sprint_slug}' not found in project '{project.name}'.")
+            counters = stats_counters(query.milestone_stats(api, sprint.id))
+            return {sprint.name: counters} if counters["stories"] else {}, project
+        sprints = project_sprints(api, project)
+
+    def sprint_counters(sprint):
+        stats = query.fetch_one(api, f"milestones/{sprint.id}/stats")
+        return sprint.name, stats_counters(stats) if stats else None
+
+    *found, backlog, expected = run_parallel(
+        *[lambda sprint=sprint: sprint_counters(sprint) for sprint in sprints],
+        lambda: ("Backlog", aggregate(query.iter_stories(api, project.id, milestone_id=query.BACKLOG))["total"]),
+        lambda: query.count_stories(api, project.id),
+    )
+    if backlog[1]["stories"] + sum(counters["stories"] for _, counters in found if counters) < expected:
+        known = {sprint.id for sprint in sprints}
+        new_sprints = [sprint for sprint in project_sprints(api, project, refresh=True) if sprint.id not in known]
+        found += run_parallel(*[lambda sprint=sprint: sprint_counters(sprint) for sprint in new_sprints])
+    return {name: counters for name, counters in [*found, backlog] if counters and counters["stories"]}, project
+
+
+def print_sprint_counters(project, sprint_counters):
+    """Print per-sprint statistics computed by the server."""
+    with profiling.phase("render"):
+        if output.structured():
+            output.write_records(counter_records(project, sprint_counters), STATS_FIELDS)
+        elif sprint_counters:
+            render_sprint_counters(project, sprint_counters)
+        else:
+            print(f"No user stories found for Project '{project.name}'.")
+
+
+def list_assigned_stories(project_slug=None, sprint_slug=None, all_sprints=False, all_users=False, user=None, status=None,
+                          offline=False, max_age=None):
     """List user stories based on project and milestone configuration."""
     try:
-        api, project_slug, sprint_slug = get_api_and_defaults(project_slug, sprint_slug, all_sprints)
-        stories, project = fetch_stories(api, project_slug, sprint_slug, all_sprints, all_users, user, status)
+        stories, project = load_stories(project_slug, sprint_slug, all_sprints, all_users, user, status, offline, max_age)
+        stories = peek_stories(stories)
 
-        if stories:
-            print(f"User Stories for Project '{project.name}':")
-            stories_by_sprint = {}
-            for story in stories:
-                sprint_name = story.milestone_name or "Backlog"
-                if sprint_name not in stories_by_sprint:
-                    stories_by_sprint[sprint_name] = []
-                stories_by_sprint[sprint_name].append(story)
-
-            for sprint_name, sprint_stories in stories_by_sprint.items():
-                print(f"* Sprint '{sprint_name}':")
-                for story in sprint_stories:
-                    status = "Closed" if story.is_closed else "Open"
-                    print(f"  * {story.subject} (Assigned to: {story.assigned_to_extra_info.get('username')}, Status: {status}, Points: {story.total_points or 0})")
+        if stories or output.structured():
+            print_stories(project, stories or ())
         else:
             print(f"No user stories found for Project '{project.name}'.")
     except Exception as e:
-        print(f"Error fetching user stories: {e}")
+        output.error(f"Error fetching user stories: {e}")
+
 
+def user_stories_stats(detailed=False, project_slug=None, sprint_slug=None, all_sprints=False, all_users=False, user=None, status=None,
+                       offline=False, max_age=None):
+    """List statistics for user stories based on filters.
 
-def user_stories_stats(detailed=False, project_slug=None, sprint_slug=None, all_sprints=False, all_users=False, user=None, status=None):
-    """List statistics for user stories based on filters."""
+    Summaries of every user's stories come from the server's sprint stats;
+    per-story details and the user and status filters need the stories.
+    """
     try:
-        api, project_slug, sprint_slug = get_api_and_defaults(project_slug, sprint_slug, all_sprints)
-        stories, project = fetch_stories(api, project_slug, sprint_slug, all_sprints, all_users, user, status)
+        project_slug, sprint_slug = get_defaults(project_slug, sprint_slug, all_sprints)
+        if all_users and not (detailed or user or status) and not mirror.fresh_project(project_slug, offline, max_age):
+            api, project_slug, sprint_slug = get_api_and_defaults(project_slug, sprint_slug, all_sprints)
+            sprint_counters, project = fetch_sprint_counters(api, project_slug, sprint_slug, all_sprints)
+            print_sprint_counters(project, sprint_counters)
+            return
+
+        stories, project = load_stories(project_slug, sprint_slug, all_sprints, all_users, user, status, offline, max_age)
+        stories = peek_stories(stories)
 
-        if not stories:
+        if not stories and not output.structured():
             print(f"No user stories found for Project '{project.name}'.")
             return
 
-        print(f"User Story Statistics for Project '{project.name}':")
-        stories_by_sprint = {}
-        for story in stories:
-            sprint_name = story.milestone_name or "Backlog"
-            if sprint_name not in stories_by_sprint:
-                stories_by_sprint[sprint_name] = []
-            stories_by_sprint[sprint_name].append(story)
-
-        for sprint_name, sprint_stories in stories_by_sprint.items():
-            total_points = sum(story.total_points or 0 for story in sprint_stories)
-            open_points = sum(story.total_points or 0 for story in sprint_stories if not story.is_closed)
-            closed_stories = sum(1 for story in sprint_stories if story.is_closed)
-            open_stories = len(sprint_stories) - closed_stories
-            progress_percentage = (closed_stories / len(sprint_stories) * 100) if sprint_stories else 0
+        print_stories_stats(project, stories or (), detailed)
+    except Exception as e:
+        output.error(f"Error fetching user story statistics: {e}")
 
-            print(f"* Sprint '{sprint_name}':")
-            print(f"  - Total Points: {total_points}")
-            print(f"  - Open Points: {open_points}")
-            print(f"  - Closed Stories: {closed_stories}")
-            print(f"  - Open Stories: {open_stories}")
-            print(f"  - Progress: {progress_percentage:.2f}%")
-
-            if detailed:
-                print("\nDetailed User Stories:")
-                for story in sprint_stories:
-                    status = "Closed" if story.is_closed else "Open"
-                    print(f"  * {story.subject} (Assigned to: {story.assigned_to_extra_info.get('username')}, Status: {status}, Points: {story.total_points or 0})")
+
+def all_projects_records(results, stats=False):
+    """Yield the story (or statistics) records of every project as its stories arrive.
+
+    Projects that failed are reported on stderr, so the records stay parseable.
+    """
+    for project, stories in results:
+        if isinstance(stories, Exception):
+            output.error(f"Error fetching user stories for Project '{project.name}': {stories}")
+        elif stats:
+            yield from stats_records(project, stories)
+        else:
+            yield from (output.story_record(story, project) for story in stories)
+
+
+def all_projects_stories(stats=False, detailed=False, all_users=False, user=None, status=None):
+    """List stories (or their statistics) across every project the user is a member of.
+
+    Projects are fetched concurrently and each one is printed as soon as it arrives.
+    """
+    api = get_api_instance()
+    if not api:
+        output.error("Unable to authenticate. Please log in using `taiga login`.")
+        return
+
+    try:
+        projects, assigned_to = run_parallel(
+            lambda: fetch_projects(api, user_only=True),
+            lambda: resolve_assignee(api, user) if user or not all_users else None,
+        )
+    except Exception as e:
+        output.error(f"Error fetching projects: {e}")
+        return
+
+    def fetch(project):
+        try:
+            return list(group_by_sprint(query.iter_stories(api, project.id, assigned_to=assigned_to, status=status)))
+        except Exception as e:
+            return e
+
+    if output.structured():
+        output.write_records(all_projects_records(map_as_completed(fetch, projects, max_workers=PROJECT_WORKERS), stats),
+                             STATS_FIELDS if stats else output.STORY_FIELDS)
+        return
+
+    found = False
+    for project, stories in map_as_completed(fetch, projects, max_workers=PROJECT_WORKERS):
+        if isinstance(stories, Exception):
+            output.error(f"Error fetching user stories for Project '{project.name}': {stories}")
+        elif stories:
+            found = True
+            if stats:
+                print_stories_stats(project, stories, detailed)
+            else:
+                print_stories(project, stories)
+
+    if not found:
+        print("No user stories found in your projects.")
+
+
+def instance_records(lines):
+    """Parse the JSON lines of every instance into records tagged with their instance.
+
+    Lines that are not records (errors) are reported on stderr, so the records stay parseable.
+    """
+    for instance, line in lines:
+        if not line or not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            output.error(f"Instance '{instance}': {line.rstrip()}")
+            continue
+        yield {"instance": instance, **record}
+
+
+def all_instances_stories(args):
+    """Run `stories ls` or `stats` on every configured instance concurrently and merge the results.
+
+    Records of every instance are written as they arrive, with an `instance`
+    column; the text listing of each instance is printed once it is complete.
+    """
+    # Imported here since only this mode starts other processes
+    from taiga_cli import instances
+
+    names = list_instances()
+    if not names:
+        output.error("Configuration not found. Please run `taiga config` first.")
+        return
+
+    argv = ["stories", *(arg for arg in args if arg and arg != "--all-instances")]
+    if output.structured():
+        fields = output.STORY_FIELDS if args[0] == "ls" else STATS_FIELDS
+        lines = instances.run_on_instances(names, ["--format", "jsonl", *argv])
+        output.write_records(instance_records(lines), ("instance", *fields))
+        return
+
+    pending = {}
+    for instance, line in instances.run_on_instances(names, argv):
+        if line is not None:
+            pending.setdefault(instance, []).append(line)
+            continue
+        print(f"Instance '{instance}':")
+        print("".join(pending.pop(instance, [])), end="")
+        sys.stdout.flush()
+
+
+def search_stories(text, project_slug=None, sprint_slug=None, user=None, status=None, offline=False, max_age=None, limit=20):
+    """Search the subject, description and tags of a project's stories in the local index.
+
+    The index is brought up to date first with one query for the stories
+    modified since the last update, unless `offline` or `max_age` allow the
+    mirror to answer as it is.
+    """
+    try:
+        project_slug, _ = get_defaults(project_slug, None, all_sprints=True)
+        project = mirror.fresh_project(project_slug, offline, max_age)
+        if not project:
+            api, project_slug = get_api_and_project(project_slug)
+            project = resolve_project(api, project_slug)
+            if not project:
+                raise ValueError(f"Project with slug '{project_slug}' not found.")
+            mirror.update_stories(api, project)
+
+        milestone_id = None
+        if sprint_slug:
+            sprint = mirror.get_sprint(project, sprint_slug)
+            if not sprint:
+                raise ValueError(f"Sprint with slug '{sprint_slug}' not found in project '{project.name}'.")
+            milestone_id = sprint.id
+        assigned_to = mirror.resolve_assignee(project, user) if user else None
+        results = mirror.search_stories(project.id, text, milestone_id=milestone_id, assigned_to=assigned_to, status=status, limit=limit)
+
+        if output.structured():
+            output.write_records((output.story_record(story, project) for story, _ in results), output.STORY_FIELDS)
+            return
+
+        with profiling.phase("render"):
+            results = peek_stories(results)
+            if not results:
+                print(f"No user stories matching '{text}' found in project '{project.name}'.")
+                return
+            print(f"User stories matching '{text}' in project '{project.name}':")
+            for story, snippet in results:
+                status_text = "Closed" if story.is_closed else "Open"
+                print(f"- {story_label(story)} (Sprint: {story.milestone_name or 'Backlog'}, "
+                      f"Assigned to: {story.assigned_username or 'Unassigned'}, Status: {status_text})")
+                if snippet:
+                    print(f"    {snippet}")
+    except Exception as e:
+        output.error(f"Error searching user stories: {e}")
+
+
+def story_label(story):
+    """Return how a story is named in the messages of bulk changes."""
+    return f"#{story.ref} {story.subject}" if story.ref else story.subject
+
+
+def select_stories(project_slug, sprint_slug, all_sprints, all_users, user, status):
+    """Fetch the stories a bulk change applies to, with the filters of `stories ls`."""
+    api, project_slug, sprint_slug = get_api_and_defaults(project_slug, sprint_slug, all_sprints)
+    stories, project = fetch_stories(api, project_slug, sprint_slug, all_sprints, all_users, user, status)
+    return api, project, list(stories)
+
+
+def report_updates(results, verb):
+    """Print the outcome of concurrent story updates."""
+    updated = 0
+    for story, result in results:
+        if isinstance(result, Exception):
+            output.error(f"Error updating story '{story_label(story)}': {result}")
+        else:
+            updated += 1
+    print(f"{verb} {updated} stories.")
+
+
+def preview(stories, action, target=""):
+    """Print the stories a bulk change would touch, for `--dry-run`."""
+    print(f"Would {action} {len(stories)} stories{target}:")
+    for story in stories:
+        print(f"- {story_label(story)}")
+
+
+def move_stories(to_sprint, project_slug=None, sprint_slug=None, all_users=False, user=None, status=None, dry_run=False):
+    """Move the stories of a sprint matching the filters to another sprint in one bulk request."""
+    if not to_sprint:
+        output.error("Error: the target sprint is required (--to-sprint=<sprint-slug>).")
+        return
+
+    try:
+        api, project, stories = select_stories(project_slug, sprint_slug, False, all_users, user, status)
+        target = resolve_sprint(api, project, to_sprint)
+        if not target:
+            raise ValueError(f"Sprint with slug '{to_sprint}' not found in project '{project.name}'.")
+        if dry_run:
+            preview(stories, "move", f" to '{target.name}'")
+            return
+        if stories:
+            bulk.move_to_sprint(api, project.id, target.id, stories)
+        print(f"Moved {len(stories)} stories to '{target.name}'.")
+    except Exception as e:
+        output.error(f"Error moving user stories: {e}")
+
+
+def close_stories(project_slug=None, sprint_slug=None, all_sprints=False, all_users=False, user=None, dry_run=False):
+    """Move the open stories matching the filters to the project's first closed status."""
+    try:
+        api, project, stories = select_stories(project_slug, sprint_slug, all_sprints, all_users, user, "open")
+        if dry_run:
+            preview(stories, "close")
+            return
+        closed_status = query.closed_story_status(api, project.id)
+        if closed_status is None:
+            raise ValueError(f"Project '{project.name}' has no closed user story status.")
+        report_updates(bulk.patch_stories(api, stories, {"status": closed_status}), "Closed")
+    except Exception as e:
+        output.error(f"Error closing user stories: {e}")
+
+
+def assign_stories(to_user, project_slug=None, sprint_slug=None, all_sprints=False, all_users=False, user=None, status=None, dry_run=False):
+    """Assign the stories matching the filters to a user ("Unassigned" clears the assignee)."""
+    if not to_user:
+        output.error("Error: the new assignee is required (--to-user=<username>).")
+        return
+
+    try:
+        api, project, stories = select_stories(project_slug, sprint_slug, all_sprints, all_users, user, status)
+        assignee = None
+        if to_user != "Unassigned":
+            assignee = resolve_user(api, to_user)
+            if not assignee:
+                raise ValueError(f"User '{to_user}' not found.")
+        if dry_run:
+            preview(stories, "assign", f" to '{to_user}'")
+            return
+        report_updates(bulk.patch_stories(api, stories, {"assigned_to": assignee.id if assignee else None}), "Assigned")
     except Exception as e:
-        print(f"Error fetching user story statistics: {e}")
+        output.error(f"Error assigning user stories: {e}")
 
 
 def run(args):
@@ -116,7 +531,15 @@ def run(args):
     sprint_slug = None
     all_users = False
     all_sprints = False
+    all_projects = False
+    all_instances = False
     project_slug = None
+    offline = False
+    max_age = None
+    to_sprint = None
+    to_user = None
+    dry_run = False
+    limit = 20
 
     for arg in args[1:]:
         if arg.startswith("--user="):
@@ -131,12 +554,47 @@ def run(args):
             all_users = True
         elif arg == "--all-sprints":
             all_sprints = True
+        elif arg == "--all-projects":
+            all_projects = True
+        elif arg == "--all-instances":
+            all_instances = True
+        elif arg == "--offline":
+            offline = True
+        elif arg.startswith("--max-age="):
+            max_age = int(arg.split("=", 1)[1])
+        elif arg.startswith("--to-sprint="):
+            to_sprint = arg.split("=", 1)[1]
+        elif arg.startswith("--to-user="):
+            to_user = arg.split("=", 1)[1]
+        elif arg == "--dry-run":
+            dry_run = True
+        elif arg.startswith("--limit="):
+            limit = int(arg.split("=", 1)[1])
 
-    if command == "ls":
-        list_assigned_stories(project_slug=project_slug, user=user, status=status, sprint_slug=sprint_slug, all_users=all_users, all_sprints=all_sprints)
+    if all_instances and command in ("ls", "stats", "stats-detailed"):
+        all_instances_stories(args)
+    elif all_projects and command in ("ls", "stats", "stats-detailed"):
+        all_projects_stories(stats=command != "ls", detailed=command == "stats-detailed", all_users=all_users, user=user, status=status)
+    elif command == "ls":
+        list_assigned_stories(project_slug=project_slug, user=user, status=status, sprint_slug=sprint_slug, all_users=all_users, all_sprints=all_sprints,
+                              offline=offline, max_age=max_age)
     elif command == "stats":
-        user_stories_stats(project_slug=project_slug, detailed=False, sprint_slug=sprint_slug, all_users=all_users, all_sprints=all_sprints, user=user, status=status)
+        user_stories_stats(project_slug=project_slug, detailed=False, sprint_slug=sprint_slug, all_users=all_users, all_sprints=all_sprints, user=user, status=status,
+                           offline=offline, max_age=max_age)
     elif command == "stats-detailed":
-        user_stories_stats(project_slug=project_slug, detailed=True, sprint_slug=sprint_slug, all_users=all_users, all_sprints=all_sprints, user=user, status=status)
+        user_stories_stats(project_slug=project_slug, detailed=True, sprint_slug=sprint_slug, all_users=all_users, all_sprints=all_sprints, user=user, status=status,
+                           offline=offline, max_age=max_age)
+    elif command == "search" and len(args) >= 2:
+        # Unquoted words are searched together
+        text = " ".join(arg for arg in args[1:] if arg and not arg.startswith("--"))
+        search_stories(text, project_slug=project_slug, sprint_slug=sprint_slug, user=user, status=status, offline=offline, max_age=max_age,
+                       limit=limit)
+    elif command == "move":
+        move_stories(to_sprint, project_slug=project_slug, sprint_slug=sprint_slug, all_users=all_users, user=user, status=status, dry_run=dry_run)
+    elif command == "close":
+        close_stories(project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=all_sprints, all_users=all_users, user=user, dry_run=dry_run)
+    elif command == "assign":
+        assign_stories(to_user, project_slug=project_slug, sprint_slug=sprint_slug, all_sprints=all_sprints, all_users=all_users, user=user, status=status,
+                       dry_run=dry_run)
     else:
         parser.print_help()
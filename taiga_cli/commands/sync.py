@@ -0,0 +1,33 @@
+from taiga_cli.commands.login import get_api_and_project
+from taiga_cli.commands.cache import resolve_project
+from taiga_cli import mirror, output
+
+
+def sync_project(project_slug=None, full=False):
+    """Mirror a project (the default one unless given) into the local database."""
+    try:
+        api, project_slug = get_api_and_project(project_slug)
+        project = resolve_project(api, project_slug)
+        if not project:
+            output.error(f"Project with slug '{project_slug}' not found.")
+            return
+
+        received = mirror.sync_project(api, project, full=full)
+        print(f"Project '{project.name}' synced: {received} stories updated, "
+              f"{mirror.count_stories(project.id)} stories mirrored.")
+    except Exception as e:
+        output.error(f"Error syncing project: {e}")
+
+
+def run(args):
+    """Handle the `taiga sync` command."""
+    project_slug = None
+    full = False
+
+    for arg in args:
+        if arg.startswith("--project="):
+            project_slug = arg.split("=", 1)[1]
+        elif arg == "--full":
+            full = True
+
+    sync_project(project_slug=project_slug, full=full)
@@ -0,0 +1,112 @@
+from taiga_cli.commands.login import get_api_and_project, get_api_instance
+from taiga_cli.commands.project import fetch_projects
+from taiga_cli.commands.cache import resolve_project
+from taiga_cli import output, profiling, query, workload
+from taiga_cli.concurrency import map_as_completed
+
+
+# Projects whose sprints are listed at the same time by `--all-projects`
+PROJECT_WORKERS = 4
+
+# Columns of `workload` records
+WORKLOAD_FIELDS = ("user", "project", "sprint", "open_points", "closed_points")
+
+
+def active_sprints(api, projects):
+    """Return the open sprints of the projects, project by project in order of their start date."""
+    found = dict(map_as_completed(lambda project: query.list_milestones(api, project.id, closed=False), projects,
+                                  max_workers=PROJECT_WORKERS))
+    sprints = []
+    for project in projects:
+        for milestone in sorted(found[project], key=lambda milestone: str(milestone.estimated_start or "")):
+            sprints.append(workload.Sprint(milestone.id, project.id, project.slug, milestone.name))
+    return sprints
+
+
+def sprint_stories(api, sprints):
+    """Stream the stories of every sprint, the sprints being fetched concurrently."""
+    for _, stories in map_as_completed(lambda sprint: query.list_stories(api, sprint.project_id, milestone_id=sprint.id), sprints):
+        yield from stories
+
+
+def user_order(matrix):
+    """Return the row positions of the users in alphabetical order, unassigned points last."""
+    return sorted(range(len(matrix.users)), key=lambda row: (matrix.users[row] == "Unassigned", matrix.users[row].lower()))
+
+
+def workload_records(matrix):
+    """Yield one record for each cell of the matrix, user by user."""
+    for row in user_order(matrix):
+        for column, sprint in enumerate(matrix.sprints):
+            open_points, closed_points = workload.cell(matrix, row, column)
+            yield {"user": matrix.users[row], "project": sprint.project, "sprint": sprint.name,
+                   "open_points": open_points, "closed_points": closed_points}
+
+
+def points_pair(open_points, closed_points):
+    """Format the open and closed points of a cell."""
+    return f"{open_points:g}/{closed_points:g}"
+
+
+def render_workload(matrix, several_projects):
+    """Write the matrix as a table with a row per user, a column per sprint and the totals."""
+    labels = [f"{sprint.project}/{sprint.name}" if several_projects else sprint.name for sprint in matrix.sprints]
+    rows = []
+    for row in user_order(matrix):
+        cells = [points_pair(*workload.cell(matrix, row, column)) for column in range(len(matrix.sprints))]
+        rows.append([matrix.users[row], *cells, points_pair(*workload.user_totals(matrix, row))])
+    totals = [workload.sprint_totals(matrix, column) for column in range(len(matrix.sprints))]
+    rows.append(["Total", *(points_pair(*total) for total in totals),
+                 points_pair(sum(total[0] for total in totals), sum(total[1] for total in totals))])
+
+    header = ["User", *labels, "Total"]
+    widths = [max(len(line[index]) for line in [header, *rows]) for index in range(len(header))]
+    print(f"Workload (open/closed points) in {len(matrix.sprints)} active sprints:")
+    for line in [header, *rows]:
+        print("  ".join([line[0].ljust(widths[0]), *(value.rjust(width) for value, width in zip(line[1:], widths[1:]))]))
+
+
+def show_workload(project_slug=None, all_projects=False):
+    """Show the open and closed points of every user in every active sprint of one or all projects."""
+    try:
+        with profiling.phase("resolve"):
+            if all_projects:
+                api = get_api_instance()
+                if not api:
+                    raise RuntimeError("Unable to authenticate. Please log in using `taiga login`.")
+                projects = fetch_projects(api, user_only=True)
+            else:
+                api, project_slug = get_api_and_project(project_slug)
+                project = resolve_project(api, project_slug)
+                if not project:
+                    raise ValueError(f"Project with slug '{project_slug}' not found.")
+                projects = [project]
+            sprints = active_sprints(api, projects)
+
+        matrix = workload.workload(sprint_stories(api, sprints), sprints)
+
+        if output.structured():
+            output.write_records(workload_records(matrix), WORKLOAD_FIELDS)
+            return
+
+        with profiling.phase("render"):
+            if not matrix.users:
+                print("No stories found in active sprints.")
+                return
+            render_workload(matrix, len(projects) > 1)
+    except Exception as e:
+        output.error(f"Error computing the workload: {e}")
+
+
+def run(args):
+    """Handle the `taiga workload` command."""
+    project_slug = None
+    all_projects = False
+
+    for arg in args:
+        if arg.startswith("--project="):
+            project_slug = arg.split("=", 1)[1]
+        elif arg == "--all-projects":
+            all_projects = True
+
+    show_workload(project_slug=project_slug, all_projects=all_projects)
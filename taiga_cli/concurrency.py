@@ -0,0 +1,32 @@
+# Upper bound on simultaneous requests issued by a single command
+MAX_WORKERS = 8
+
+
+def run_parallel(*calls):
+    """Run independent callables concurrently and return their results in order.
+
+    The first exception raised by any call is re-raised once all calls finish.
+    """
+    if len(calls) <= 1:
+        return [call() for call in calls]
+
+    # Imported here since it pulls in logging, which offline commands never need
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(calls))) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
+
+
+def map_as_completed(func, items, max_workers=MAX_WORKERS):
+    """Apply a function to every item concurrently, yielding `(item, result)` as each finishes."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    items = list(items)
+    if not items:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,222 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from taiga_cli.commands.config import CONFIG_DIR, write_file, write_json
+
+
+CACHE_DIR = CONFIG_DIR / "http-cache"
+INDEX_FILE = CACHE_DIR / "index.json"
+INDEX_LOCK = CACHE_DIR / "index.lock"
+
+# Response headers kept with a cached body, everything else is dropped
+STORED_HEADERS = ("content-type", "etag", "last-modified", "x-pagination-count", "x-pagination-next",
+                  "x-pagination-prev", "x-paginated", "x-paginated-by")
+
+# Seconds after which an index lock left behind by a crashed process is ignored
+LOCK_TIMEOUT = 5
+
+# Bodies without an index entry are deleted once they are this many seconds old; younger
+# ones may belong to a response another process is storing right now
+ORPHAN_AGE = 60
+
+# This process's view of the index
+_index = None
+_index_lock = threading.Lock()
+
+# Changes not merged into the index on disk yet: stored (entry) or dropped (None)
+# responses, and the last use of responses read from the cache
+_pending = {}
+_touched = {}
+
+# Size limit of the last `write`, applied again when the index is merged at exit
+_max_size = None
+_flush_registered = False
+
+
+def cache_key(url, params, headers):
+    """Return the key of a GET request; responses are only shared by requests sent with the same token."""
+    identity = json.dumps([url, sorted((str(k), str(v)) for k, v in params.items()),
+                           headers.get("Authorization"), headers.get("x-disable-pagination")])
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def read_index_file():
+    """Read the index on disk, or an empty one if it is missing or damaged."""
+    try:
+        with INDEX_FILE.open('r') as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_index():
+    """Load the index of stored responses: key -> validators, headers, size and last use."""
+    global _index
+    if _index is None:
+        _index = read_index_file()
+    return _index
+
+
+def acquire_index_lock():
+    """Take the index lock shared by every CLI process, waiting a little for another holder."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            os.close(os.open(INDEX_LOCK, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - INDEX_LOCK.stat().st_mtime > LOCK_TIMEOUT:
+                    INDEX_LOCK.unlink()
+                    continue
+            except OSError:
+                pass
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+
+
+def evict(index, max_size):
+    """Drop the least recently used responses past `max_size` bytes, and bodies nothing refers to.
+
+    Sizes are those of the files in the cache directory, so a body left
+    behind by a crashed process still counts until it is deleted.
+    """
+    now = time.time()
+    sizes = {}
+    for path in CACHE_DIR.iterdir():
+        if len(path.name) != 64 or "." in path.name:
+            continue
+        stat = path.stat()
+        if path.name in index:
+            sizes[path.name] = stat.st_size
+        elif now - stat.st_mtime > ORPHAN_AGE:
+            path.unlink(missing_ok=True)
+
+    for key in [key for key in index if key not in sizes]:
+        del index[key]
+    total = sum(sizes.values())
+    for key in sorted(index, key=lambda k: index[k]["last_used"]):
+        if total <= max_size:
+            break
+        total -= sizes[key]
+        del index[key]
+        (CACHE_DIR / key).unlink(missing_ok=True)
+
+
+def merge_index(max_size=None):
+    """Merge this process's changes into the index on disk and save it (call with `_index_lock` held).
+
+    Other processes may have stored or evicted responses since the index was
+    read, so it is read again under the shared lock and only the changes made
+    here are applied to it. If the lock cannot be taken, the changes are kept
+    for the next merge.
+    """
+    global _index
+    if not acquire_index_lock():
+        return
+    try:
+        index = read_index_file()
+        for key, entry in _pending.items():
+            if entry is None:
+                index.pop(key, None)
+            else:
+                index[key] = entry
+        for key, used in _touched.items():
+            if key in index:
+                index[key]["last_used"] = max(index[key]["last_used"], used)
+        if max_size is not None:
+            evict(index, max_size)
+        write_json(INDEX_FILE, index, indent=None)
+        _pending.clear()
+        _touched.clear()
+        _index = index
+    finally:
+        INDEX_LOCK.unlink(missing_ok=True)
+
+
+def flush():
+    """Save the changes not merged yet, such as the last use of responses read from the cache."""
+    with _index_lock:
+        if _pending or _touched:
+            merge_index(_max_size)
+
+
+def schedule_flush():
+    """Merge the pending changes when the process exits, instead of rewriting the index on every read."""
+    global _flush_registered
+    if not _flush_registered:
+        _flush_registered = True
+        atexit.register(flush)
+
+
+def conditional_headers(key):
+    """Return the validator headers to send for a request, or an empty dict if nothing is stored."""
+    with _index_lock:
+        entry = load_index().get(key)
+    if not entry:
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def read(key):
+    """Return `(headers, body)` of a stored response and mark it as recently used, or None."""
+    with _index_lock:
+        entry = load_index().get(key)
+        if not entry:
+            return None
+        try:
+            body = (CACHE_DIR / key).read_bytes()
+        except OSError:
+            del _index[key]
+            _pending[key] = None
+            schedule_flush()
+            return None
+        _touched[key] = time.time()
+        schedule_flush()
+        return entry["headers"], body
+
+
+def write(key, headers, body, max_size):
+    """Store a response that carries validators, evicting the least recently used ones past `max_size` bytes."""
+    global _max_size
+    etag = headers.get("ETag")
+    last_modified = headers.get("Last-Modified")
+    if not (etag or last_modified) or len(body) > max_size:
+        return
+
+    with _index_lock:
+        _max_size = max_size
+        write_file(CACHE_DIR / key, body)
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": {k: v for k, v in headers.items() if k.lower() in STORED_HEADERS},
+            "size": len(body),
+            "last_used": time.time(),
+        }
+        load_index()[key] = entry
+        _pending[key] = entry
+        merge_index(max_size)
+
+
+def clear():
+    """Drop every stored response."""
+    global _index
+    with _index_lock:
+        _index = None
+        _pending.clear()
+        _touched.clear()
+        if CACHE_DIR.exists():
+            for path in CACHE_DIR.iterdir():
+                path.unlink()
+            CACHE_DIR.rmdir()
@@ -0,0 +1,54 @@
+import os
+import sys
+import threading
+
+
+# Environment variable naming the selected instance; `taiga --instance NAME` sets it.
+# Defined here rather than in the configuration module, which fixes its paths on import.
+INSTANCE_VARIABLE = "TAIGA_INSTANCE"
+
+# Name under which the instance configured in the base directory is listed
+DEFAULT_INSTANCE = "default"
+
+
+def instance_process(instance, argv):
+    """Start the CLI on an instance in a process of its own, with its output piped back."""
+    # Imported here since the configuration imports this module on every run
+    import subprocess
+    env = {**os.environ, INSTANCE_VARIABLE: instance}
+    return subprocess.Popen(
+        [sys.executable, "-m", "taiga_cli.main", *argv],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        env=env,
+        text=True,
+    )
+
+
+def run_on_instances(instances, argv):
+    """Run a command on every instance concurrently, yielding `(instance, line)` as output lines arrive.
+
+    Each instance runs in a separate process, so configurations, tokens,
+    caches and connections never mix. A None line marks the end of an
+    instance's output. Errors are reported by the commands themselves.
+    """
+    from queue import Queue
+    lines = Queue()
+
+    def read(instance, process):
+        with process.stdout:
+            for line in process.stdout:
+                lines.put((instance, line))
+        process.wait()
+        lines.put((instance, None))
+
+    for instance in instances:
+        process = instance_process(instance, argv)
+        threading.Thread(target=read, args=(instance, process), daemon=True).start()
+
+    running = len(instances)
+    while running:
+        instance, line = lines.get()
+        if line is None:
+            running -= 1
+        yield instance, line
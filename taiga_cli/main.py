@@ -1,25 +1,50 @@
+import argparse
+import importlib
+import os
+import sys
 from taiga_cli.cliparser import parser
-from taiga_cli.commands import config, login, project, sprint, stories
+from taiga_cli import output, profiling, query
 
 
-def main():
+def load_command(name):
+    """Import a command module on demand, so a run only loads the command it executes."""
+    return importlib.import_module(f"taiga_cli.commands.{name}")
+
+
+def build_parser():
+    """Register the commands on the shared parser (once per process) and return it.
+
+    The flag lives on the parser, since `python -m taiga_cli.main` loads this
+    module twice (as `__main__` and when a batch imports it) and both copies
+    share the parser.
+    """
+    if getattr(parser, "commands_registered", False):
+        return parser
+    parser.commands_registered = True
+
     parser.add_argument('--version', action='version', version='taiga-cli 1.0')
+    parser.add_argument('--query-stats', action='store_true', help='Report data transferred and avoided by server-side filtering')
+    parser.add_argument('--format', choices=output.FORMATS, default='text', help='Output format of listings and statistics')
+    parser.add_argument('--profile', action='store_true', help='Time every request and local phase and print a summary')
+    parser.add_argument('--profile-trace', metavar='FILE', help='Write the --profile measurements to a JSON file', default=None)
+    parser.add_argument('--instance', metavar='NAME', help='Use a named Taiga instance, with its own configuration, token and caches', default=None)
     subparsers = parser.add_subparsers(title='Commands', dest='command')
 
     # Comando: config
     config_parser = subparsers.add_parser('config', help='Configure server and user')
-    config_parser.set_defaults(func=config.run)
+    config_parser.add_argument('--instance', metavar='NAME', help='Configure a named Taiga instance', default=argparse.SUPPRESS)
+    config_parser.set_defaults(func=lambda args: load_command('config').run(args))
 
     # Comando: login
     login_parser = subparsers.add_parser('login', help='Login to a taiga instance')
-    login_parser.set_defaults(func=login.run)
+    login_parser.set_defaults(func=lambda args: load_command('login').run(args))
 
     # Comando: projects
     project_parser = subparsers.add_parser('project', help='Manage projects')
     project_parser.add_argument('subcommand', nargs='*', help='Subcommands for projects')
     project_parser.add_argument('--all', action='store_true', help='List all projects')
     project_parser.add_argument('--default', action='store_true', help='Show the default configured project')
-    project_parser.set_defaults(func=lambda args: project.run([
+    project_parser.set_defaults(func=lambda args: load_command('project').run([
         *args.subcommand,
         '--all' if args.all else ''
     ]))
@@ -27,19 +52,27 @@ def main():
     # Comando: sprint
     sprint_parser = subparsers.add_parser('sprint', help='Manage milestones (sprint)')
     sprint_parser.add_argument('subcommand', nargs='*', help='Subcommands for sprints')
-    sprint_parser.set_defaults(func=lambda args: sprint.run(args.subcommand))
+    sprint_parser.set_defaults(func=lambda args: load_command('sprint').run(args.subcommand))
     sprint_parser.add_argument('--user', help='Filter sprint by username', default=None)
     sprint_parser.add_argument('--status', choices=['open', 'closed'], help='Filter sprint by status', default=None)
     sprint_parser.add_argument('--sprint', help='Filter sprint by slug', default=None)
     sprint_parser.add_argument('--project', help='Filter sprint by project slug', default=None)
     sprint_parser.add_argument('--all-users', action='store_true', help='List stories without filtering by user')
-    sprint_parser.set_defaults(func=lambda args: sprint.run([
+    sprint_parser.add_argument('--offline', action='store_true', help='Answer from the local mirror (see `taiga sync`)')
+    sprint_parser.add_argument('--max-age', type=int, help='Answer from the local mirror if synced at most this many seconds ago', default=None)
+    sprint_parser.add_argument('--last', type=int, help='Number of recent sprints shown by `velocity` (default 5)', default=None)
+    sprint_parser.add_argument('--watch', type=float, metavar='INTERVAL', help='Keep `user-stories` on screen, polling for changes every INTERVAL seconds', default=None)
+    sprint_parser.set_defaults(func=lambda args: load_command('sprint').run([
         *args.subcommand,
         f"--user={args.user}" if args.user else "",
         f"--status={args.status}" if args.status else "",
         f"--sprint={args.sprint}" if args.sprint else "",
         f"--project={args.project}" if args.project else "",
-        "--all-users" if args.all_users else ""
+        "--all-users" if args.all_users else "",
+        "--offline" if args.offline else "",
+        f"--max-age={args.max_age}" if args.max_age is not None else "",
+        f"--last={args.last}" if args.last is not None else "",
+        f"--watch={args.watch:g}" if args.watch else ""
     ]))
 
     # Comando: stories
@@ -51,24 +84,124 @@ def main():
     stories_parser.add_argument('--project', help='Filter project by sprint slug', default=None)
     stories_parser.add_argument('--all-users', action='store_true', help='List stories without filtering by user')
     stories_parser.add_argument('--all-sprints', action='store_true', help='List stories from all sprints')
-    stories_parser.set_defaults(func=lambda args: stories.run([
+    stories_parser.add_argument('--all-projects', action='store_true', help='List stories from every project you are a member of')
+    stories_parser.add_argument('--all-instances', action='store_true', help='Run `ls` or `stats` on every configured instance and merge the results')
+    stories_parser.add_argument('--offline', action='store_true', help='Answer from the local mirror (see `taiga sync`)')
+    stories_parser.add_argument('--max-age', type=int, help='Answer from the local mirror if synced at most this many seconds ago', default=None)
+    stories_parser.add_argument('--from-sprint', dest='sprint', help='Sprint whose stories `move` moves (same as --sprint)')
+    stories_parser.add_argument('--to-sprint', help='Sprint that `move` moves the stories to', default=None)
+    stories_parser.add_argument('--to-user', help='User that `assign` assigns the stories to ("Unassigned" clears it)', default=None)
+    stories_parser.add_argument('--dry-run', action='store_true', help='Show the stories `move`, `close` or `assign` would change')
+    stories_parser.add_argument('--limit', type=int, help='Maximum number of `search` results (default 20)', default=None)
+    stories_parser.set_defaults(func=lambda args: load_command('stories').run([
         *args.subcommand,
         f"--user={args.user}" if args.user else "",
         f"--status={args.status}" if args.status else "",
         f"--sprint={args.sprint}" if args.sprint else "",
         f"--project={args.project}" if args.project else "",
         "--all-users" if args.all_users else "",
-        "--all-sprints" if args.all_sprints else ""
+        "--all-sprints" if args.all_sprints else "",
+        "--all-projects" if args.all_projects else "",
+        "--all-instances" if args.all_instances else "",
+        "--offline" if args.offline else "",
+        f"--max-age={args.max_age}" if args.max_age is not None else "",
+        f"--to-sprint={args.to_sprint}" if args.to_sprint else "",
+        f"--to-user={args.to_user}" if args.to_user else "",
+        "--dry-run" if args.dry_run else "",
+        f"--limit={args.limit}" if args.limit is not None else ""
     ]))
 
-    # Parse arguments
-    args = parser.parse_args()
+    # Comando: workload
+    workload_parser = subparsers.add_parser('workload', help='Show open and closed points per user in every active sprint')
+    workload_parser.add_argument('--project', help='Project slug to use instead of the default one', default=None)
+    workload_parser.add_argument('--all-projects', action='store_true', help='Include the active sprints of every project you are a member of')
+    workload_parser.set_defaults(func=lambda args: load_command('workload').run([
+        f"--project={args.project}" if args.project else "",
+        "--all-projects" if args.all_projects else ""
+    ]))
+
+    # Comando: cache
+    cache_parser = subparsers.add_parser('cache', help='Manage the local slug cache')
+    cache_parser.add_argument('subcommand', nargs='*', help='Subcommands for cache (clear, refresh)')
+    cache_parser.set_defaults(func=lambda args: load_command('cache').run(args.subcommand))
+
+    # Comando: daemon
+    daemon_parser = subparsers.add_parser('daemon', help='Manage the local connection daemon')
+    daemon_parser.add_argument('subcommand', nargs='*', help='Subcommands for daemon (start, stop, status)')
+    daemon_parser.set_defaults(func=lambda args: load_command('daemon').run(args.subcommand))
+
+    # Comando: sync
+    sync_parser = subparsers.add_parser('sync', help='Mirror the default project into a local database')
+    sync_parser.add_argument('--project', help='Project slug to mirror instead of the default one', default=None)
+    sync_parser.add_argument('--full', action='store_true', help='Download every story again instead of only changed ones')
+    sync_parser.set_defaults(func=lambda args: load_command('sync').run([
+        f"--project={args.project}" if args.project else "",
+        "--full" if args.full else ""
+    ]))
+
+    # Comando: batch
+    batch_parser = subparsers.add_parser('batch', help='Run commands read from a file or stdin in one process')
+    batch_parser.add_argument('file', nargs='?', help='File with one command per line (default: stdin)', default=None)
+    batch_parser.set_defaults(func=lambda args: load_command('batch').run([args.file] if args.file else []))
+
+    # Comando: completion
+    completion_parser = subparsers.add_parser('completion', help='Print the shell completion script (bash, zsh, fish) or refresh its slugs')
+    completion_parser.add_argument('subcommand', nargs='*', help='Subcommands for completion (bash, zsh, fish, refresh)')
+    completion_parser.set_defaults(func=lambda args: load_command('completion').run(args.subcommand))
+
+    return parser
+
+
+def select_instance(name):
+    """Make the commands use a named instance's configuration, token and caches.
+
+    Every file path is fixed when the configuration module is imported, so
+    the instance cannot change once a command has run (e.g. within a batch).
+    """
+    if name.startswith(".") or not name.replace("-", "").replace("_", "").replace(".", "").isalnum():
+        parser.error(f"invalid instance name '{name}'")
+
+    # The constants come from a module without paths, so importing them fixes none
+    from taiga_cli.instances import DEFAULT_INSTANCE, INSTANCE_VARIABLE
+    loaded = 'taiga_cli.commands.config' in sys.modules
+    current = os.environ.get(INSTANCE_VARIABLE) or DEFAULT_INSTANCE
+    if loaded and name != current:
+        parser.error(f"--instance {name} cannot be used after commands ran on instance '{current}'")
+    os.environ[INSTANCE_VARIABLE] = name
+
+
+def dispatch(argv):
+    """Parse one command line (without the program name) and run it."""
+    args = build_parser().parse_args(argv)
 
     if args.command:
+        if args.instance:
+            select_instance(args.instance)
+        query.report_enabled = args.query_stats
+        output.output_format = args.format
+        profiling.enabled = args.profile or bool(args.profile_trace)
+        if args.query_stats:
+            query.reset_stats()
+        if profiling.enabled:
+            profiling.start()
         args.func(args)
+        if args.query_stats:
+            query.print_report()
+        if args.profile:
+            profiling.print_report()
+        if args.profile_trace:
+            profiling.write_trace(args.profile_trace)
     else:
         parser.print_help()
 
 
+def main():
+    if sys.argv[1:2] == ['__complete']:
+        # Called by the completion scripts on every TAB: no dispatching, reports or profiling
+        load_command('completion').complete(sys.argv[2:])
+        return
+    dispatch(sys.argv[1:])
+
+
 if __name__ == '__main__':
     main()
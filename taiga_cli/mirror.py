@@ -0,0 +1,356 @@
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from taiga_cli import records
+from taiga_cli.commands.config import CONFIG_DIR, ensure_config_directory, load_config
+from taiga_cli.records import Story
+
+
+MIRROR_FILE = CONFIG_DIR / "mirror.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    api_url TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    name TEXT NOT NULL,
+    synced_at REAL,
+    watermark TEXT,
+    reconciled_at REAL
+);
+CREATE TABLE IF NOT EXISTS milestones (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL,
+    slug TEXT NOT NULL,
+    name TEXT NOT NULL,
+    closed INTEGER NOT NULL,
+    estimated_start TEXT,
+    estimated_finish TEXT
+);
+CREATE TABLE IF NOT EXISTS members (
+    project_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    full_name TEXT,
+    PRIMARY KEY (project_id, id)
+);
+CREATE TABLE IF NOT EXISTS stories (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL,
+    ref INTEGER,
+    subject TEXT NOT NULL,
+    milestone_id INTEGER,
+    milestone_name TEXT,
+    is_closed INTEGER NOT NULL,
+    total_points REAL,
+    assigned_to INTEGER,
+    assigned_username TEXT,
+    status INTEGER,
+    modified_date TEXT
+);
+CREATE INDEX IF NOT EXISTS stories_by_milestone ON stories (project_id, milestone_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5 (
+    subject, description, tags, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Bumped on every schema change; `connect` migrates older databases
+SCHEMA_VERSION = 2
+
+# Seconds after which `taiga sync` pulls every story again instead of only the modified ones,
+# dropping stories deleted on the server even when the story counts happen to match
+RECONCILE_INTERVAL = 24 * 60 * 60
+
+# Weights of the subject, description and tags columns when ranking search results
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0)
+
+Ref = namedtuple("Ref", ["id", "slug", "name"])
+
+STORY_COLUMNS = ("id", "project_id", "ref", "subject", "milestone_id", "milestone_name", "is_closed",
+                 "total_points", "assigned_to", "assigned_username", "status", "modified_date")
+
+
+def connect():
+    """Open the mirror database, creating its tables on first use."""
+    ensure_config_directory()
+    connection = sqlite3.connect(MIRROR_FILE)
+    connection.executescript(SCHEMA)
+    (version,) = connection.execute("PRAGMA user_version").fetchone()
+    if version < SCHEMA_VERSION:
+        with connection:
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(projects)")}
+            if "reconciled_at" not in columns:
+                connection.execute("ALTER TABLE projects ADD COLUMN reconciled_at REAL")
+            if version < 1:
+                # Stories mirrored before the search index existed are pulled again by the next sync
+                connection.execute("UPDATE projects SET watermark = NULL")
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return connection
+
+
+def timestamp(value):
+    """Store dates parsed by the API client as ISO 8601 text."""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def story_row(project_id, story):
+    """Flatten a user story record from the API into a `stories` row."""
+    return (
+        story.id, project_id, story.ref, story.subject, story.milestone, story.milestone_name, story.is_closed,
+        story.total_points, story.assigned_to, story.assigned_username, story.status, story.modified_date,
+    )
+
+
+def search_row(entry):
+    """Return the indexed text of a user story from the API: subject, description and tag names."""
+    tags = " ".join(tag[0] if isinstance(tag, list) else str(tag) for tag in entry.get("tags") or [] if tag)
+    return entry["id"], entry.get("subject") or "", entry.get("description") or "", tags
+
+
+def pull_stories(connection, api, project, since=None):
+    """Store the stories of a project modified after `since`, or all of them, and their search index.
+
+    Returns the number of stories received and the newest `modified_date` seen.
+    """
+    # Imported here so offline reads never load the HTTP helpers
+    from taiga_cli import query
+
+    params = {"project": project.id}
+    if since:
+        params["modified_date__gt"] = since
+    else:
+        connection.execute("DELETE FROM stories_fts WHERE rowid IN (SELECT id FROM stories WHERE project_id = ?)", (project.id,))
+        connection.execute("DELETE FROM stories WHERE project_id = ?", (project.id,))
+
+    received = 0
+    watermark = since
+    placeholders = ", ".join("?" for _ in STORY_COLUMNS)
+    # Raw pages, since the description and tags are only kept in the search index
+    for entries in query.iter_pages(api, "userstories", **params):
+        for entry in entries:
+            row = story_row(project.id, records.story(entry))
+            connection.execute(f"INSERT OR REPLACE INTO stories VALUES ({placeholders})", row)
+            connection.execute("DELETE FROM stories_fts WHERE rowid = ?", (row[0],))
+            connection.execute("INSERT INTO stories_fts (rowid, subject, description, tags) VALUES (?, ?, ?, ?)", search_row(entry))
+            received += 1
+            # The newest modification the server reported, so client clock skew does not matter
+            if not watermark or row[-1] > watermark:
+                watermark = row[-1]
+    return received, watermark
+
+
+def sync_project(api, project, full=False):
+    """Mirror a project's milestones, members and stories.
+
+    Stories are pulled incrementally: only those modified after the newest
+    `modified_date` seen by the previous sync. Every story is pulled again,
+    replacing the mirrored ones, if `full` is set, if the last full pull is
+    older than `RECONCILE_INTERVAL`, or if the server then holds another
+    number of stories than the mirror. The counts alone cannot tell a
+    deleted story apart when another one was added, hence the periodic pull.
+
+    Returns the number of stories received.
+    """
+    # Imported here so offline reads never load the HTTP helpers
+    from taiga_cli import query
+    from taiga_cli.concurrency import run_parallel
+
+    api_url = load_config().get("api_url")
+    connection = connect()
+    try:
+        row = connection.execute("SELECT watermark, reconciled_at FROM projects WHERE id = ? AND api_url = ?",
+                                 (project.id, api_url)).fetchone()
+        since = row[0] if row and not full else None
+        if since and time.time() - (row[1] or 0) > RECONCILE_INTERVAL:
+            since = None
+        reconciled_at = row[1] if since else time.time()
+
+        milestones, members = run_parallel(
+            lambda: list(query.iter_milestones(api, project=project.id)),
+            lambda: query.fetch_list(api, api.users, project=project.id),
+        )
+
+        with connection:
+            connection.execute("DELETE FROM milestones WHERE project_id = ?", (project.id,))
+            connection.executemany(
+                "INSERT INTO milestones VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(m.id, project.id, m.slug, m.name, bool(m.closed), timestamp(m.estimated_start), timestamp(m.estimated_finish)) for m in milestones])
+            connection.execute("DELETE FROM members WHERE project_id = ?", (project.id,))
+            connection.executemany(
+                "INSERT INTO members VALUES (?, ?, ?, ?)",
+                [(project.id, u.id, u.username, u.full_name_display) for u in members])
+            received, watermark = pull_stories(connection, api, project, since)
+            connection.execute("INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (project.id, api_url, project.slug, project.name, time.time(), watermark, reconciled_at))
+
+        (mirrored,) = connection.execute("SELECT COUNT(*) FROM stories WHERE project_id = ?", (project.id,)).fetchone()
+    finally:
+        connection.close()
+
+    if since and mirrored != query.count_stories(api, project.id):
+        return received + sync_project(api, project, full=True)
+    return received
+
+
+def update_stories(api, project):
+    """Bring the stories of a project up to date with a single incremental query, mirroring it first if needed.
+
+    Unlike `sync_project`, milestones and members are left as they are and
+    deleted stories are only dropped by the next `taiga sync`.
+    """
+    api_url = load_config().get("api_url")
+    connection = connect()
+    try:
+        row = connection.execute("SELECT watermark FROM projects WHERE id = ? AND api_url = ?",
+                                 (project.id, api_url)).fetchone()
+        if row is not None:
+            with connection:
+                received, watermark = pull_stories(connection, api, project, row[0])
+                connection.execute("UPDATE projects SET synced_at = ?, watermark = ? WHERE id = ?",
+                                   (time.time(), watermark, project.id))
+            return received
+    finally:
+        connection.close()
+    return sync_project(api, project)
+
+
+def get_project(project_slug):
+    """Return the mirrored project with a slug and the time of its last sync, or `(None, None)`."""
+    if not MIRROR_FILE.exists():
+        return None, None
+    connection = connect()
+    try:
+        row = connection.execute("SELECT id, slug, name, synced_at FROM projects WHERE slug = ? AND api_url = ?",
+                                 (project_slug, load_config().get("api_url"))).fetchone()
+    finally:
+        connection.close()
+    if not row or row[3] is None:
+        return None, None
+    return Ref(*row[:3]), row[3]
+
+
+def fresh_project(project_slug, offline=False, max_age=None):
+    """Return the mirrored project to answer from, or None to ask the server.
+
+    With `offline` the mirror must exist; with `max_age` it is only used if
+    synced at most that many seconds ago.
+    """
+    if not offline and max_age is None:
+        return None
+    project, synced_at = get_project(project_slug)
+    if offline:
+        if not project:
+            raise ValueError(f"Project '{project_slug}' is not mirrored. Run `taiga sync` first.")
+        return project
+    if project and time.time() - synced_at <= max_age:
+        return project
+    return None
+
+
+def get_sprint(project, sprint_slug):
+    """Return the mirrored sprint of a project with a slug, or None."""
+    connection = connect()
+    try:
+        row = connection.execute("SELECT id, slug, name FROM milestones WHERE project_id = ? AND slug = ?",
+                                 (project.id, sprint_slug)).fetchone()
+    finally:
+        connection.close()
+    return Ref(*row) if row else None
+
+
+def resolve_assignee(project, username=None):
+    """Resolve the `assigned_to` filter value among the project members, defaulting to the configured user."""
+    if username == "Unassigned":
+        return "null"
+    username = username or load_config().get("username")
+    connection = connect()
+    try:
+        row = connection.execute("SELECT id FROM members WHERE project_id = ? AND username = ?",
+                                 (project.id, username)).fetchone()
+    finally:
+        connection.close()
+    if not row:
+        raise ValueError(f"User '{username}' not found.")
+    return row[0]
+
+
+def story_conditions(project_id, milestone_id=None, assigned_to=None, status=None):
+    """Build the SQL conditions matching `query.story_filters`."""
+    # Imported here for the BACKLOG marker only
+    from taiga_cli.query import BACKLOG
+
+    conditions, values = ["s.project_id = ?"], [project_id]
+    if milestone_id == BACKLOG:
+        conditions.append("s.milestone_id IS NULL")
+    elif milestone_id is not None:
+        conditions.append("s.milestone_id = ?")
+        values.append(milestone_id)
+    if assigned_to == "null":
+        conditions.append("s.assigned_to IS NULL")
+    elif assigned_to is not None:
+        conditions.append("s.assigned_to = ?")
+        values.append(assigned_to)
+    if status is not None:
+        conditions.append("s.is_closed = ?")
+        values.append(status == "closed")
+    return " AND ".join(conditions), values
+
+
+def iter_stories(project_id, milestone_id=None, assigned_to=None, status=None):
+    """Yield mirrored stories matching the filters, grouped by sprint in sprint order with the backlog last."""
+    where, values = story_conditions(project_id, milestone_id, assigned_to, status)
+    connection = connect()
+    try:
+        rows = connection.execute(
+            "SELECT s.id, s.ref, s.subject, s.milestone_id, s.milestone_name, s.is_closed, s.total_points, "
+            "s.assigned_to, s.assigned_username, s.status, s.modified_date "
+            "FROM stories s LEFT JOIN milestones m ON m.id = s.milestone_id "
+            f"WHERE {where} ORDER BY s.milestone_id IS NULL, m.estimated_start, s.milestone_id, s.id",
+            values)
+        for row in rows:
+            # The mirror keeps no versions or finish dates
+            yield Story(row[0], row[1], None, row[2], row[3], row[4], bool(row[5]), row[6], row[7], row[8], row[9], row[10], None)
+    finally:
+        connection.close()
+
+
+def count_stories(project_id, milestone_id=None, assigned_to=None, status=None):
+    """Count mirrored stories matching the filters."""
+    where, values = story_conditions(project_id, milestone_id, assigned_to, status)
+    connection = connect()
+    try:
+        return connection.execute(f"SELECT COUNT(*) FROM stories s WHERE {where}", values).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query matching every word, as a prefix, in any indexed column."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        raise ValueError("The search text has no words to look for.")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_stories(project_id, text, milestone_id=None, assigned_to=None, status=None, limit=20):
+    """Return the mirrored stories best matching a text, with the filters of `iter_stories`.
+
+    Yields `(story, snippet)` pairs, best match first; the snippet is the part
+    of the description around the match, or None if it did not match there.
+    """
+    where, values = story_conditions(project_id, milestone_id, assigned_to, status)
+    connection = connect()
+    try:
+        rows = connection.execute(
+            "SELECT s.id, s.ref, s.subject, s.milestone_id, s.milestone_name, s.is_closed, s.total_points, "
+            "s.assigned_to, s.assigned_username, s.status, s.modified_date, "
+            "snippet(stories_fts, 1, char(1), char(2), '...', 12) "
+            "FROM stories_fts JOIN stories s ON s.id = stories_fts.rowid "
+            f"WHERE stories_fts MATCH ? AND {where} ORDER BY bm25(stories_fts, ?, ?, ?) LIMIT ?",
+            [match_expression(text), *values, *SEARCH_WEIGHTS, limit]).fetchall()
+    finally:
+        connection.close()
+    for row in rows:
+        snippet = row[11].replace("\x01", "[").replace("\x02", "]") if "\x01" in row[11] else None
+        yield Story(row[0], row[1], None, row[2], row[3], row[4], bool(row[5]), row[6], row[7], row[8], row[9], row[10], None), snippet
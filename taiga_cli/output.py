@@ -0,0 +1,76 @@
+import csv
+import json
+import sys
+from taiga_cli import profiling
+from taiga_cli.aggregate import progress
+
+
+# Output formats accepted by `--format`; "text" is the human-readable listing
+FORMATS = ("text", "json", "jsonl", "csv")
+
+# Format selected for the current command
+output_format = "text"
+
+# Columns of the listings that more than one command writes
+STORY_FIELDS = ("id", "ref", "subject", "project", "sprint", "assigned_to", "status", "points")
+COUNTER_FIELDS = ("stories", "open_stories", "closed_stories", "points", "open_points", "progress")
+
+
+def structured():
+    """Return whether the current command writes machine-readable records instead of text."""
+    return output_format != "text"
+
+
+def error(message):
+    """Print an error message, on stderr when stdout carries records so they stay parseable."""
+    print(message, file=sys.stderr if structured() else sys.stdout)
+
+
+def write_records(records, fields, stream=None):
+    """Write records (dicts) in the selected format as they are produced.
+
+    Each record is written as soon as the iterable yields it, so long
+    listings start flowing before the last page is downloaded. `fields` fixes
+    the CSV columns; JSON formats keep every key of the record.
+    """
+    stream = stream or sys.stdout
+    with profiling.phase("render"):
+        write_formatted(records, fields, stream)
+
+
+def write_formatted(records, fields, stream):
+    """Write records to a stream in the selected format."""
+    if output_format == "jsonl":
+        for record in records:
+            stream.write(json.dumps(record) + "\n")
+    elif output_format == "json":
+        separator = "[\n"
+        for record in records:
+            stream.write(separator + json.dumps(record))
+            separator = ",\n"
+        stream.write("[]\n" if separator == "[\n" else "\n]\n")
+    elif output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(records)
+    else:
+        raise ValueError(f"Unknown output format '{output_format}'.")
+
+
+def story_record(story, project=None):
+    """Flatten a user story into a record with the `STORY_FIELDS` columns."""
+    return {
+        "id": story.id,
+        "ref": story.ref,
+        "subject": story.subject,
+        "project": project.slug if project else None,
+        "sprint": story.milestone_name or "Backlog",
+        "assigned_to": story.assigned_username,
+        "status": "Closed" if story.is_closed else "Open",
+        "points": story.total_points or 0,
+    }
+
+
+def counter_record(counters, **keys):
+    """Flatten a counter set from `aggregate` into a record, after the given key columns."""
+    return {**keys, **{name: counters.get(name) for name in COUNTER_FIELDS[:-1]}, "progress": round(progress(counters), 2)}
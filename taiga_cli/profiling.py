@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Whether the current command is being profiled (`taiga --profile`)
+enabled = False
+
+# Every HTTP call of the command: method, endpoint, status, bytes, latency and cache use
+calls = []
+
+# Local phases: name -> {"count", "seconds", "request_seconds"}
+phases = {}
+
+_started = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def start():
+    """Forget earlier measurements and start timing a command."""
+    global _started
+    with _lock:
+        calls.clear()
+        phases.clear()
+    _started = time.perf_counter()
+
+
+def record_call(method, endpoint, status, size, seconds, cache="-"):
+    """Record an HTTP call; `cache` is "hit" (answered from the local store), "miss" or "-"."""
+    if not enabled:
+        return
+    with _lock:
+        calls.append({
+            "method": method,
+            "endpoint": endpoint,
+            "status": status,
+            "bytes": size,
+            "ms": round(seconds * 1000, 2),
+            "cache": cache,
+        })
+    # Lets the phases running in this thread tell their own time from time spent waiting
+    _local.request_seconds = getattr(_local, "request_seconds", 0) + seconds
+
+
+@contextmanager
+def phase(name):
+    """Time a local phase of the command, e.g. `with profiling.phase("aggregate"): ...`.
+
+    Phases that consume streamed results include the requests made while they
+    run; those are reported apart, as far as they ran in the same thread. A
+    phase opened again inside itself (e.g. `write_records` within a render)
+    is only counted once, by the outer one.
+    """
+    if not enabled:
+        yield
+        return
+    active = getattr(_local, "active", None)
+    if active is None:
+        active = _local.active = set()
+    if name in active:
+        yield
+        return
+
+    started = time.perf_counter()
+    waited = getattr(_local, "request_seconds", 0)
+    active.add(name)
+    try:
+        yield
+    finally:
+        active.discard(name)
+        seconds = time.perf_counter() - started
+        request_seconds = getattr(_local, "request_seconds", 0) - waited
+        with _lock:
+            totals = phases.setdefault(name, {"count": 0, "seconds": 0, "request_seconds": 0})
+            totals["count"] += 1
+            totals["seconds"] += seconds
+            totals["request_seconds"] += request_seconds
+
+
+def trace():
+    """Return the measurements of the command as a JSON-serializable dict."""
+    with _lock:
+        return {
+            "total_ms": round((time.perf_counter() - _started) * 1000, 2) if _started else None,
+            "requests": list(calls),
+            "phases": {name: {"count": totals["count"],
+                              "ms": round(totals["seconds"] * 1000, 2),
+                              "request_ms": round(totals["request_seconds"] * 1000, 2)}
+                       for name, totals in phases.items()},
+        }
+
+
+def write_trace(path):
+    """Write the measurements of the command to a JSON file."""
+    with open(path, 'w') as trace_file:
+        json.dump(trace(), trace_file, indent=4)
+
+
+def print_report():
+    """Print a summary table of the requests and phases of the command."""
+    data = trace()
+    requests = data["requests"]
+    request_ms = sum(call["ms"] for call in requests)
+    hits = sum(1 for call in requests if call["cache"] == "hit")
+    print(f"Profile: {data['total_ms']:.1f} ms total, {len(requests)} requests ({hits} cache hits), "
+          f"{request_ms:.1f} ms waiting for the server, {sum(call['bytes'] for call in requests) / 1024:.1f} KiB.")
+
+    if requests:
+        print(f"  {'METHOD':<7}{'STATUS':>6}  {'CACHE':<5}{'BYTES':>9}{'MS':>9}  ENDPOINT")
+        for call in requests:
+            print(f"  {call['method']:<7}{call['status']:>6}  {call['cache']:<5}{call['bytes']:>9}{call['ms']:>9.1f}  {call['endpoint']}")
+
+    if data["phases"]:
+        print(f"  {'PHASE':<14}{'COUNT':>6}{'MS':>10}{'LOCAL MS':>10}")
+        for name, totals in data["phases"].items():
+            print(f"  {name:<14}{totals['count']:>6}{totals['ms']:>10.1f}{totals['ms'] - totals['request_ms']:>10.1f}")
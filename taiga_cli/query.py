@@ -0,0 +1,228 @@
+import threading
+from taiga_cli import records
+
+
+# Transfer counters for the current process, printed by `taiga --query-stats`
+stats = {
+    "requests": 0,
+    "objects": 0,
+    "bytes": 0,
+    "cached": 0,
+    "avoided_objects": 0,
+    "avoided_bytes": 0,
+}
+
+report_enabled = False
+
+# Objects requested per page when streaming lists
+PAGE_SIZE = 100
+
+# Milestone filter value for stories outside of any sprint
+BACKLOG = "backlog"
+
+_stats_lock = threading.Lock()
+
+
+def reset_stats():
+    """Zero the transfer counters, e.g. between the commands of a batch."""
+    with _stats_lock:
+        for key in stats:
+            stats[key] = 0
+
+
+def record(response, objects):
+    """Account for a response received from the server."""
+    with _stats_lock:
+        stats["requests"] += 1
+        stats["objects"] += objects
+        if getattr(response, "from_cache", False):
+            # The server only confirmed the stored copy is current
+            stats["cached"] += 1
+        else:
+            stats["bytes"] += len(response.content)
+
+
+def count(api, endpoint, params, accounted=True):
+    """Return how many objects match a query, transferring at most one of them.
+
+    Returns a tuple `(count, bytes_per_object)`, or `(None, None)` if the server
+    did not report a count.
+    """
+    headers = api.raw_request.headers()
+    # Lazy pagination skips the count, so ask for a regular paginated page
+    headers.pop("x-lazy-pagination", None)
+    response = api.raw_request.request("GET", endpoint, query={**params, "page_size": 1}, headers=headers)
+
+    items = response.json()
+    if accounted:
+        record(response, len(items))
+    total = response.headers.get("x-pagination-count")
+    if total is None:
+        return None, None
+    return int(total), (len(response.content) / len(items) if items else 0)
+
+
+def track_avoided(api, endpoint, baseline_params, received):
+    """Estimate what the unfiltered query would have transferred (only when reporting)."""
+    if not report_enabled:
+        return
+    total, bytes_per_object = count(api, endpoint, baseline_params, accounted=False)
+    if total is None or total <= received:
+        return
+    with _stats_lock:
+        stats["avoided_objects"] += total - received
+        stats["avoided_bytes"] += int((total - received) * bytes_per_object)
+
+
+def iter_pages(api, endpoint, **params):
+    """Yield the pages of a filtered list as JSON arrays, requesting one page at a time.
+
+    Only the current page is held in memory; the next one is requested once
+    the consumer has gone through it and the server announced more pages.
+    """
+    page = 1
+    while True:
+        response = api.raw_request.get(endpoint, query={**params, "page": page, "page_size": PAGE_SIZE})
+        entries = response.json()
+        record(response, len(entries))
+        yield entries
+        if not response.headers.get("x-pagination-next"):
+            return
+        page += 1
+
+
+def iter_list(api, resource, **params):
+    """Yield the objects of a filtered list parsed into model instances, one page at a time."""
+    for entries in iter_pages(api, resource.instance.endpoint, **params):
+        yield from resource.parse_list(entries)
+
+
+def fetch_list(api, resource, **params):
+    """Fetch every page of a filtered list, parsed into model instances."""
+    return list(iter_list(api, resource, **params))
+
+
+def fetch_one(api, endpoint, **params):
+    """Fetch a single object from a lookup endpoint, or None if it does not exist."""
+    from taiga.exceptions import TaigaRestException
+
+    try:
+        response = api.raw_request.get(endpoint, query=params)
+    except TaigaRestException as e:
+        if e.status_code == 404:
+            return None
+        raise
+    record(response, 1)
+    return response.json()
+
+
+def story_filters(project_id, milestone_id=None, assigned_to=None, status=None):
+    """Build the user story query parameters for the filters the CLI exposes.
+
+    A `milestone_id` of `BACKLOG` selects stories that are not in any sprint.
+    """
+    params = {"project": project_id}
+    if milestone_id == BACKLOG:
+        params["milestone__isnull"] = True
+    elif milestone_id is not None:
+        params["milestone"] = milestone_id
+    if assigned_to is not None:
+        params["assigned_to"] = assigned_to
+    if status == "open":
+        params["is_closed"] = False
+    elif status == "closed":
+        params["is_closed"] = True
+    return params
+
+
+def get_project_by_slug(api, project_slug):
+    """Get a project through the by-slug endpoint, or None if it does not exist."""
+    found = fetch_one(api, "projects/by_slug", slug=project_slug)
+    if found is None:
+        return None
+    track_avoided(api, "projects", {}, 1)
+    return api.projects.instance.parse(api.raw_request, found)
+
+
+def get_user_by_username(api, username):
+    """Get a user through the by-username endpoint, or None if it does not exist."""
+    found = fetch_one(api, "users/by_username", username=username)
+    if found is None:
+        return None
+    return api.users.instance.parse(api.raw_request, found)
+
+
+def iter_milestones(api, **params):
+    """Stream milestones as compact `records.Milestone` tuples, without parsing the stories each one embeds."""
+    for entries in iter_pages(api, "milestones", **params):
+        yield from map(records.milestone, entries)
+
+
+def list_milestones(api, project_id, closed=None):
+    """List the milestones of a project, optionally only open or closed ones."""
+    params = {"project": project_id}
+    if closed is not None:
+        params["closed"] = closed
+    milestones = list(iter_milestones(api, **params))
+    if closed is not None:
+        track_avoided(api, "milestones", {"project": project_id}, len(milestones))
+    return milestones
+
+
+def milestone_stats(api, milestone_id):
+    """Fetch the totals the server keeps for a milestone: its stories, the completed ones and their points."""
+    stats = fetch_one(api, f"milestones/{milestone_id}/stats")
+    if stats is None:
+        raise ValueError(f"Sprint {milestone_id} not found.")
+    return stats
+
+
+def closed_story_status(api, project_id):
+    """Return the ID of the first closed user story status of a project, or None if it has none."""
+    response = api.raw_request.get("userstory-statuses", query={"project": project_id})
+    statuses = response.json()
+    record(response, len(statuses))
+    closed = sorted((status for status in statuses if status["is_closed"]), key=lambda status: status.get("order", 0))
+    return closed[0]["id"] if closed else None
+
+
+def iter_story_records(api, **params):
+    """Stream user stories as compact `records.Story` tuples instead of the API client's models."""
+    for entries in iter_pages(api, "userstories", **params):
+        yield from map(records.story, entries)
+
+
+def iter_stories(api, project_id, milestone_id=None, assigned_to=None, status=None):
+    """Stream user stories page by page with every filter applied on the server."""
+    params = story_filters(project_id, milestone_id, assigned_to, status)
+    received = 0
+    for story in iter_story_records(api, **params):
+        received += 1
+        yield story
+    if milestone_id != BACKLOG:
+        track_avoided(api, "userstories", story_filters(project_id, milestone_id), received)
+
+
+def list_stories(api, project_id, milestone_id=None, assigned_to=None, status=None):
+    """List user stories with every filter applied on the server."""
+    return list(iter_stories(api, project_id, milestone_id, assigned_to, status))
+
+
+def count_stories(api, project_id, milestone_id=None, assigned_to=None, status=None):
+    """Count user stories matching the filters without downloading them."""
+    params = story_filters(project_id, milestone_id, assigned_to, status)
+    total, _ = count(api, "userstories", params)
+    if total is None:
+        total = sum(1 for _ in iter_story_records(api, **params))
+    return total
+
+
+def print_report():
+    """Print the transfer counters collected during the command."""
+    print(f"Query stats: {stats['requests']} requests, {stats['objects']} objects, "
+          f"{stats['bytes'] / 1024:.1f} KiB received.")
+    if stats["cached"]:
+        print(f"{stats['cached']} responses were unchanged and served from the local cache.")
+    if stats["avoided_objects"]:
+        print(f"Server-side filtering avoided {stats['avoided_objects']} objects "
+              f"(~{stats['avoided_bytes'] / 1024:.1f} KiB).")
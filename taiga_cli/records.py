@@ -0,0 +1,33 @@
+from collections import namedtuple
+
+
+# A user story reduced to the fields the commands read; everything else the API
+# returns (descriptions, nested owner and status info, ...) is dropped on arrival
+Story = namedtuple("Story", [
+    "id", "ref", "version", "subject", "milestone", "milestone_name", "is_closed", "total_points",
+    "assigned_to", "assigned_username", "status", "modified_date", "finish_date",
+])
+
+
+# A milestone (sprint) reduced to the fields the commands read. The API embeds every
+# user story of the sprint in each milestone, which is dropped on arrival too
+Milestone = namedtuple("Milestone", ["id", "slug", "name", "closed", "estimated_start", "estimated_finish"])
+
+
+def story(entry):
+    """Project a user story from the API's JSON onto a `Story`, keeping dates as the server's ISO 8601 text."""
+    extra = entry.get("assigned_to_extra_info")
+    return Story(
+        entry["id"], entry.get("ref"), entry.get("version"), entry.get("subject"), entry.get("milestone"),
+        entry.get("milestone_name"), bool(entry.get("is_closed")), entry.get("total_points"),
+        entry.get("assigned_to"), extra.get("username") if extra else None, entry.get("status"),
+        entry.get("modified_date"), entry.get("finish_date"),
+    )
+
+
+def milestone(entry):
+    """Project a milestone from the API's JSON onto a `Milestone`, keeping dates as the server's ISO 8601 text."""
+    return Milestone(
+        entry["id"], entry.get("slug"), entry.get("name"), bool(entry.get("closed")),
+        entry.get("estimated_start"), entry.get("estimated_finish"),
+    )
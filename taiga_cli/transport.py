@@ -0,0 +1,284 @@
+import datetime
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from taiga import TaigaAPI, utils
+from taiga.exceptions import TaigaRestException
+from taiga.requestmaker import RequestMaker
+from taiga_cli import http_cache, profiling
+
+
+# Connection settings, overridable with an "http" section in config.json
+settings = {
+    "pool_size": 10,
+    "timeout": 30,
+    # Bytes of GET responses kept for conditional requests, 0 disables the cache
+    "cache_size": 50 * 1024 * 1024,
+    # Attempts after the first one for requests that failed on the way or were answered with `RETRY_STATUSES`
+    "retries": 3,
+    # Seconds the first retry waits at most, doubled for each later one up to `max_backoff`
+    "backoff": 0.5,
+    "max_backoff": 30,
+    # Requests per second this process sends at most (0 for no limit), with bursts of up to `burst` requests
+    "rate_limit": 0,
+    "burst": 10,
+}
+
+# Methods whose requests can be sent again without changing the outcome
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# Answers worth retrying. Other methods are only retried on 429, which the server did not process.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Token bucket shared by every thread, plus the pause a server asked for with Retry-After
+_bucket = {"tokens": None, "updated": 0.0, "paused_until": 0.0}
+_bucket_lock = threading.Lock()
+
+
+def configure(config):
+    """Apply the "http" settings of a configuration to the shared session."""
+    global _session
+    with _session_lock:
+        settings.update(config.get("http", {}))
+        _session = None
+
+
+def get_session():
+    """Return the keep-alive session shared by every API call in this process."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=settings["pool_size"], pool_maxsize=settings["pool_size"])
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def send(method, url, **kwargs):
+    """Send a request through the shared session."""
+    kwargs.setdefault("timeout", settings["timeout"])
+    return get_session().request(method, url, **kwargs)
+
+
+def throttle():
+    """Wait until the client-side rate limit, and any pause the server asked for, lets a request go."""
+    while True:
+        with _bucket_lock:
+            now = time.monotonic()
+            wait = _bucket["paused_until"] - now
+            if wait <= 0:
+                rate = settings["rate_limit"]
+                if not rate:
+                    return
+                burst = settings["burst"]
+                tokens = burst if _bucket["tokens"] is None else min(burst, _bucket["tokens"] + (now - _bucket["updated"]) * rate)
+                _bucket["updated"] = now
+                if tokens >= 1:
+                    _bucket["tokens"] = tokens - 1
+                    return
+                _bucket["tokens"] = tokens
+                wait = (1 - tokens) / rate
+        time.sleep(wait)
+
+
+def pause(seconds):
+    """Hold back every request of this process for some seconds, e.g. when the server answers 429."""
+    with _bucket_lock:
+        _bucket["paused_until"] = max(_bucket["paused_until"], time.monotonic() + seconds)
+
+
+def retry_delay(attempt, response=None):
+    """Return the seconds to wait before a retry: the server's Retry-After, or exponential backoff with jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(retry_after) - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return min(max(seconds, 0), settings["max_backoff"])
+    # Random delays keep clients that failed together from retrying together
+    return random.uniform(0, min(settings["max_backoff"], settings["backoff"] * 2 ** attempt))
+
+
+def cached_response(not_modified, cache_key):
+    """Turn a 304 answer into the stored 200 response it refers to, or None if it is gone."""
+    stored = http_cache.read(cache_key)
+    if stored is None:
+        return None
+    headers, body = stored
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update(headers)
+    response._content = body
+    response.encoding = "utf-8"
+    response.url = not_modified.url
+    response.request = not_modified.request
+    response.from_cache = True
+    return response
+
+
+class SessionRequestMaker(RequestMaker):
+    """RequestMaker that sends every call through the shared keep-alive session.
+
+    When `host` points to a local connection daemon, `direct_host` is the real
+    server, used instead if the daemon stops answering.
+    """
+
+    def __init__(self, api_path, host, token, token_type="Bearer", tls_verify=True, proxies=None, direct_host=None):
+        super().__init__(api_path, host, token, token_type, tls_verify, proxies=proxies)
+        self.direct_host = direct_host or host
+
+    def is_bad_response(self, response):
+        # The base class lets 501 and above through as successes
+        return response.status_code >= 400
+
+    def request(self, method, uri, query=None, payload=None, files=None, paginate=True, headers=None, **parameters):
+        """Send a request and raise `TaigaRestException` on network, client or server errors.
+
+        Requests that fail on the way or are answered with `RETRY_STATUSES` are
+        sent again after a backoff, if their method is idempotent or the server
+        answered 429. A 429 holds back every request of the process.
+        """
+        full_url = self.urljoin(self.host, self.api_path, uri.format(**parameters))
+        if files:
+            data = payload
+            request_headers = {
+                "Authorization": "{} {}".format(self.token_type, self.token),
+                "x-disable-pagination": "True",
+            }
+        else:
+            data = json.dumps(payload) if method in ("POST", "PUT", "PATCH") else None
+            request_headers = self.headers(paginate)
+        if headers is not None:
+            request_headers = headers
+
+        cache_key = None
+        if method == "GET" and settings["cache_size"]:
+            cache_key = http_cache.cache_key(full_url, query or {}, request_headers)
+            request_headers = {**request_headers, **http_cache.conditional_headers(cache_key)}
+
+        for attempt in range(settings["retries"] + 1):
+            last_attempt = attempt == settings["retries"]
+            throttle()
+            started = time.perf_counter()
+            try:
+                response = send(
+                    method,
+                    full_url,
+                    headers=request_headers,
+                    data=data,
+                    params=query or {},
+                    files=files,
+                    verify=self.tls_verify,
+                    proxies=self.proxies,
+                )
+            except requests.RequestException as e:
+                if isinstance(e, requests.ConnectionError) and self.host != self.direct_host:
+                    # The connection daemon went away, talk to the server directly
+                    self.host = self.direct_host
+                    return self.request(method, uri, query, payload, files, paginate, headers, **parameters)
+                if method not in IDEMPOTENT_METHODS or last_attempt:
+                    raise TaigaRestException(full_url, 400, "Network error!", method)
+                time.sleep(retry_delay(attempt))
+                continue
+
+            if profiling.enabled:
+                endpoint = uri.format(**parameters) + (f"?{urlencode(query)}" if query else "")
+                cache = ("hit" if response.status_code == 304 else "miss") if cache_key else "-"
+                profiling.record_call(method, endpoint, response.status_code, len(response.content),
+                                      time.perf_counter() - started, cache)
+
+            retryable = response.status_code == 429 or (method in IDEMPOTENT_METHODS and response.status_code in RETRY_STATUSES)
+            if not retryable or last_attempt:
+                break
+            delay = retry_delay(attempt, response)
+            if response.status_code == 429:
+                pause(delay)
+            else:
+                time.sleep(delay)
+
+        if cache_key:
+            if response.status_code == 304:
+                # A body missing from disk is dropped from the index, so the retry is unconditional
+                response = cached_response(response, cache_key) or self.request(
+                    method, uri, query, payload, files, paginate, headers, **parameters)
+            elif response.status_code == 200:
+                http_cache.write(cache_key, response.headers, response.content, settings["cache_size"])
+
+        if self.is_bad_response(response):
+            raise TaigaRestException(full_url, response.status_code, response.text, method)
+        return response
+
+    def get(self, uri, query=None, cache=False, paginate=True, **parameters):
+        full_url = self.get_full_url(uri, **parameters)
+        if cache:
+            try:
+                return self._cache.get(full_url)
+            except Exception:
+                pass
+        response = self.request("GET", uri, query=query, paginate=paginate, **parameters)
+        if cache:
+            self._cache.put(full_url, response)
+        return response
+
+    def post(self, uri, payload=None, query=None, files=None, **parameters):
+        return self.request("POST", uri, query=query, payload=payload, files=files, **parameters)
+
+    def put(self, uri, payload=None, query=None, **parameters):
+        return self.request("PUT", uri, query=query, payload=payload, **parameters)
+
+    def patch(self, uri, payload=None, query=None, **parameters):
+        return self.request("PATCH", uri, query=query, payload=payload, **parameters)
+
+    def delete(self, uri, query=None, **parameters):
+        return self.request("DELETE", uri, query=query, **parameters)
+
+
+def create_api(host, token, daemon_url=None):
+    """Create a TaigaAPI whose requests go through the shared session (or the daemon)."""
+    api = TaigaAPI(host=host)
+    api.token = token
+    api.raw_request = SessionRequestMaker("/api/v1", daemon_url or host, token, direct_host=host)
+    api._init_resources()
+    return api
+
+
+def post_auth(host, endpoint, payload):
+    """POST to an authentication endpoint and return the decoded response."""
+    full_url = utils.urljoin(host, "/api/v1", endpoint)
+    started = time.perf_counter()
+    try:
+        response = send("POST", full_url, data=json.dumps(payload), headers={"Content-type": "application/json"})
+    except requests.RequestException:
+        raise TaigaRestException(full_url, 400, "NETWORK ERROR", "POST")
+    profiling.record_call("POST", endpoint, response.status_code, len(response.content), time.perf_counter() - started)
+    if response.status_code != 200:
+        raise TaigaRestException(full_url, response.status_code, response.text, "POST")
+    return response.json()
+
+
+def authenticate(host, username, password):
+    """Log in with a username and password and return an authenticated TaigaAPI."""
+    data = post_auth(host, "auth", {"type": "normal", "username": username, "password": password})
+    api = create_api(host, data["auth_token"])
+    api.token_refresh = data.get("refresh")
+    return api
+
+
+def refresh_auth(host, refresh):
+    """Exchange a refresh token for a new auth token (and, on newer servers, a new refresh token)."""
+    return post_auth(host, "auth/refresh", {"refresh": refresh})
@@ -0,0 +1,58 @@
+from array import array
+from collections import namedtuple
+from taiga_cli import profiling
+from taiga_cli.aggregate import user_key
+
+
+# A column of the matrix: an active sprint and the project it belongs to
+Sprint = namedtuple("Sprint", ["id", "project_id", "project", "name"])
+
+# Points per user and sprint. `points` is one flat array holding a row per user
+# (in `users` order) of an (open, closed) pair for every sprint of `sprints`.
+Workload = namedtuple("Workload", ["users", "sprints", "points"])
+
+
+def workload(stories, sprints):
+    """Fill the matrix of open and closed points per assignee and sprint in a single pass.
+
+    The sprints fix the columns up front; a row of zeros is appended to the
+    flat array whenever a new assignee appears, so each story costs one
+    dictionary lookup and one addition. Stories of other sprints are ignored.
+    """
+    columns = {sprint.id: index * 2 for index, sprint in enumerate(sprints)}
+    width = len(sprints) * 2
+    empty_row = array("d", [0.0]) * width
+    rows = {}
+    points = array("d")
+
+    with profiling.phase("aggregate"):
+        for story in stories:
+            column = columns.get(story.milestone)
+            if column is None:
+                continue
+            user = user_key(story)
+            row = rows.get(user)
+            if row is None:
+                row = rows[user] = len(rows) * width
+                points.extend(empty_row)
+            points[row + column + (1 if story.is_closed else 0)] += story.total_points or 0
+
+    return Workload(list(rows), list(sprints), points)
+
+
+def cell(matrix, row, column):
+    """Return the (open, closed) points of the user and sprint at the given positions."""
+    offset = (row * len(matrix.sprints) + column) * 2
+    return matrix.points[offset], matrix.points[offset + 1]
+
+
+def user_totals(matrix, row):
+    """Return the (open, closed) points of a user over every sprint."""
+    values = matrix.points[row * len(matrix.sprints) * 2:(row + 1) * len(matrix.sprints) * 2]
+    return sum(values[0::2]), sum(values[1::2])
+
+
+def sprint_totals(matrix, column):
+    """Return the (open, closed) points of a sprint over every user."""
+    width = len(matrix.sprints) * 2
+    return sum(matrix.points[column * 2::width]), sum(matrix.points[column * 2 + 1::width])
@@ -0,0 +1,35 @@
+import sys
+import pytest
+
+
+@pytest.fixture
+def fresh_modules(tmp_path, monkeypatch):
+    """Run a test with a temporary HOME, no selected instance and the CLI modules not imported yet."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("TAIGA_INSTANCE", raising=False)
+    for name in [name for name in sys.modules if name.startswith("taiga_cli")]:
+        monkeypatch.delitem(sys.modules, name)
+    return tmp_path
+
+
+def test_select_instance_sets_config_file(fresh_modules):
+    from taiga_cli.main import select_instance
+    select_instance("internal")
+
+    from taiga_cli.commands import config
+    assert config.CONFIG_FILE == config.INSTANCES_DIR / "internal" / "config.json"
+
+
+def test_default_instance_uses_base_directory(fresh_modules):
+    from taiga_cli.main import select_instance
+    select_instance("default")
+
+    from taiga_cli.commands import config
+    assert config.CONFIG_FILE == config.BASE_DIR / "config.json"
+
+
+def test_instance_cannot_change_after_config_loaded(fresh_modules):
+    from taiga_cli.commands import config  # noqa: F401
+    from taiga_cli.main import select_instance
+    with pytest.raises(SystemExit):
+        select_instance("internal")